@@ -0,0 +1,823 @@
+"""
+A search over the elimination orders of a Profile, shared by the multi-round elimination rules.
+
+Rules such as STV, Baldwin and Coombs remove one candidate with the worst score in each round. When
+several candidates tie for the worst score every one of them may be removed, so the set of possible
+winners (the PUT winners) is found by a depth-first search over the sets of remaining candidates.
+
+A set of remaining candidates is an integer bitmask whose bit i is set when the i-th candidate of
+Profile.getCandList() remains. The score of a round is computed by a scorer object, see
+EliminationScorer, so the same search serves every rule. Hard profiles can be searched by several
+processes at once with parallelEliminationSearch().
+"""
+import abc
+import collections
+import multiprocessing
+import os
+import time
+import numpy as np
+import rankmatrix
+
+
+def stateToIndices(state):
+    """
+    Returns the sorted list of the indices of the bits set in the state.
+
+    :ivar int state: A bitmask of remaining candidates.
+    """
+
+    indices = []
+    while state:
+        cand = state & -state
+        indices.append(cand.bit_length() - 1)
+        state ^= cand
+    return indices
+
+
+class EliminationScorer(abc.ABC):
+    """
+    The scores of the remaining candidates in one round of an elimination rule. Subclasses
+    implement getScores(), and may override getLosers() to change which candidates can be removed.
+
+    The search calls advance() when it moves from a state to the state without one candidate and
+    retreat() when it comes back, so a scorer may update its scores incrementally instead of
+    computing them from scratch in each state. Both calls are always made in a matching pair.
+
+    :ivar int numCands: The number of candidates.
+    """
+
+    def __init__(self, numCands):
+        self.numCands = numCands
+
+    @abc.abstractmethod
+    def getScores(self, state):
+        """
+        Returns a list with the score of each candidate in the state. The entries of the
+        candidates that do not remain are ignored.
+
+        :ivar int state: A bitmask of remaining candidates.
+        """
+
+        pass
+
+    def getLosers(self, state):
+        """
+        Returns a list of the indices of the remaining candidates that can be removed from the
+        state, by default those with the lowest score.
+
+        :ivar int state: A bitmask of remaining candidates.
+        """
+
+        scores = self.getScores(state)
+        remaining = stateToIndices(state)
+        worst = min([scores[i] for i in remaining])
+        return [i for i in remaining if scores[i] == worst]
+
+    def advance(self, state, cand):
+        """
+        Called when the search moves from the state to the state without the candidate.
+
+        :ivar int state: The bitmask of remaining candidates before the candidate is removed.
+        :ivar int cand: The index of the candidate removed.
+        """
+
+        pass
+
+    def retreat(self, state, cand):
+        """
+        Called when the search comes back to the state from the state without the candidate.
+
+        :ivar int state: The bitmask of remaining candidates before the candidate is removed.
+        :ivar int cand: The index of the candidate removed.
+        """
+
+        pass
+
+
+def getTierStates(rankMatrix):
+    """
+    Returns a list, one for each row of the rank matrix, of the bitmasks of its tiers, ordered from
+    most preferred to least.
+
+    :ivar ndarray rankMatrix: The (n, m) rank matrix of the profile, see Profile.getRankMatrix().
+    """
+
+    numVotes, numCands = rankMatrix.shape
+    if numCands > 62:
+        tiersList = rankmatrix.getTiers(rankMatrix, list(range(numCands)))
+        tierStatesList = []
+        for tiers in tiersList:
+            tierStates = []
+            for tier in tiers:
+                tierState = 0
+                for i in tier:
+                    tierState |= 1 << i
+                tierStates.append(tierState)
+            tierStatesList.append(tierStates)
+        return tierStatesList
+
+    # Entry [v, r] collects the bits of the candidates at position r of vote v. Position 0 holds
+    # the unranked candidates and is left out.
+    tierStates = np.zeros((numVotes, numCands + 1), dtype=np.int64)
+    rows = np.arange(numVotes)
+    for i in range(0, numCands):
+        tierStates[rows, rankMatrix[:, i]] |= np.int64(1) << i
+    return [[tierState for tierState in row if tierState] for row in tierStates[:, 1:].tolist()]
+
+
+class TierScorer(EliminationScorer):
+    """
+    Scores each remaining candidate by the number of voters who rank it in their first tier of
+    remaining candidates, scanning the tiers of each vote in a given order. Every candidate of that
+    tier gets the vote.
+
+    :ivar list<list<int>> tierStates: The bitmasks of the tiers of each vote, in the order they
+        are scanned.
+    :ivar list<int> counts: The number of voters of each vote. Votes given by no voter are left
+        out, so every candidate who gets a vote has a positive score.
+    """
+
+    def __init__(self, numCands, tierStates, counts):
+        EliminationScorer.__init__(self, numCands)
+        self.tierStates = []
+        self.counts = []
+        for tiers, count in zip(tierStates, counts):
+            if count > 0:
+                self.tierStates.append(tiers)
+                self.counts.append(int(count))
+
+    def getVotes(self, state):
+        """
+        Returns a dictionary that associates the bit of each remaining candidate that gets a vote
+        with its number of votes.
+
+        :ivar int state: A bitmask of remaining candidates.
+        """
+
+        votes = dict()
+        for tierStates, count in zip(self.tierStates, self.counts):
+            for tierState in tierStates:
+                top = tierState & state
+                if top:
+                    break
+            while top:
+                cand = top & -top
+                votes[cand] = votes.get(cand, 0) + count
+                top ^= cand
+        return votes
+
+    def getScores(self, state):
+        scores = [0] * self.numCands
+        for cand, count in self.getVotes(state).items():
+            scores[cand.bit_length() - 1] = count
+        return scores
+
+
+class IncrementalPluralityScorer(EliminationScorer):
+    """
+    Scores each remaining candidate by the number of voters who rank it first among the remaining
+    candidates, as STV does, and keeps the scores up to date as the search moves between states.
+    When a voter ranks several remaining candidates in the top tier each of them gets the vote.
+
+    Each vote points to its top tier of remaining candidates, and each candidate has a bucket of
+    the votes whose top tier holds it. Removing a candidate only moves the votes of its bucket to
+    their next tier, and the moves are undone when the search comes back, so a step costs time in
+    the number of votes touched rather than in the number of votes.
+
+    :ivar list<list<int>> tierStates: The bitmasks of the tiers of each vote, see getTierStates().
+    :ivar list<int> counts: The number of voters of each vote.
+    :ivar int state: The bitmask of remaining candidates that the scores are kept for.
+    :ivar list<int> scores: The plurality score of each candidate in the state.
+    :ivar list<int> pointers: The index of the top tier of remaining candidates of each vote.
+    :ivar list<list<int>> buckets: The indices of the votes whose top tier holds each candidate.
+        The buckets of the candidates that do not remain are not kept up to date.
+    """
+
+    def __init__(self, rankMatrix, counts):
+        EliminationScorer.__init__(self, rankMatrix.shape[1])
+        self.tierStates = getTierStates(rankMatrix)
+        self.counts = [int(count) for count in counts]
+        self.state = None
+
+    def reset(self, state):
+        """
+        Computes the scores of the state from scratch.
+
+        :ivar int state: A bitmask of remaining candidates.
+        """
+
+        self.state = state
+        self.scores = [0] * self.numCands
+        self.pointers = [0] * len(self.tierStates)
+        self.buckets = [[] for i in range(0, self.numCands)]
+        # Each entry holds the votes moved by one call to advance() and their previous pointers.
+        self.moves = []
+        for vote in range(0, len(self.tierStates)):
+            tierStates = self.tierStates[vote]
+            pointer = 0
+            while pointer < len(tierStates) and tierStates[pointer] & state == 0:
+                pointer += 1
+            self.pointers[vote] = pointer
+            if pointer < len(tierStates):
+                self.addVote(vote, tierStates[pointer] & state)
+
+    def addVote(self, vote, top):
+        """
+        Gives the vote to each candidate of top, a bitmask of remaining candidates.
+        """
+
+        count = self.counts[vote]
+        while top:
+            cand = top & -top
+            i = cand.bit_length() - 1
+            self.scores[i] += count
+            self.buckets[i].append(vote)
+            top ^= cand
+
+    def getScores(self, state):
+        if state != self.state:
+            self.reset(state)
+        return self.scores
+
+    def advance(self, state, cand):
+        if state != self.state:
+            self.reset(state)
+        childState = state & ~(1 << cand)
+        scores = self.scores
+        pointers = self.pointers
+        moved = []
+        for vote in self.buckets[cand]:
+            count = self.counts[vote]
+            scores[cand] -= count
+            tierStates = self.tierStates[vote]
+            pointer = pointers[vote]
+
+            # The vote stays in its tier as long as another candidate of the tier remains.
+            if tierStates[pointer] & childState:
+                continue
+            moved.append((vote, pointer))
+            pointer += 1
+            while pointer < len(tierStates) and tierStates[pointer] & childState == 0:
+                pointer += 1
+            pointers[vote] = pointer
+            if pointer < len(tierStates):
+                top = tierStates[pointer] & childState
+                if top & (top - 1) == 0:
+                    i = top.bit_length() - 1
+                    scores[i] += count
+                    self.buckets[i].append(vote)
+                else:
+                    self.addVote(vote, top)
+        self.moves.append(moved)
+        self.state = childState
+
+    def retreat(self, state, cand):
+        childState = self.state
+        scores = self.scores
+        pointers = self.pointers
+        moved = self.moves.pop()
+
+        # The votes were appended to the buckets in order, so they are removed in reverse.
+        for vote, pointer in reversed(moved):
+            tierStates = self.tierStates[vote]
+            if pointers[vote] < len(tierStates):
+                count = self.counts[vote]
+                top = tierStates[pointers[vote]] & childState
+                while top:
+                    nextCand = top & -top
+                    i = nextCand.bit_length() - 1
+                    scores[i] -= count
+                    self.buckets[i].pop()
+                    top ^= nextCand
+            pointers[vote] = pointer
+        for vote in self.buckets[cand]:
+            scores[cand] += self.counts[vote]
+        self.state = state
+
+
+class VetoScorer(TierScorer):
+    """
+    Scores each remaining candidate by the number of voters who rank it last among the remaining
+    candidates, and removes those with the highest score, as Coombs does. When a voter ranks
+    several remaining candidates in the bottom tier each of them gets the vote.
+
+    :ivar ndarray rankMatrix: The (n, m) rank matrix of the profile, see Profile.getRankMatrix().
+    :ivar ndarray counts: The number of voters of each row of the rank matrix.
+    """
+
+    def __init__(self, rankMatrix, counts):
+        tierStates = [tierStates[::-1] for tierStates in getTierStates(rankMatrix)]
+        TierScorer.__init__(self, rankMatrix.shape[1], tierStates, counts)
+
+    def getLosers(self, state):
+        votes = self.getVotes(state)
+        if len(votes) == 0:
+            return stateToIndices(state)
+        worst = max(votes.values())
+        return sorted([cand.bit_length() - 1 for cand, count in votes.items() if count == worst])
+
+
+class IncrementalBordaScorer(EliminationScorer):
+    """
+    Scores each remaining candidate by the number of times it is ranked above another remaining
+    candidate, which is its Borda score in the profile restricted to the remaining candidates, as
+    Baldwin does. The scores are the row sums of the pairwise matrix over the remaining columns,
+    so removing a candidate subtracts its column from them and coming back adds it again, in O(m)
+    per step.
+
+    :ivar ndarray pairwiseMatrix: The (m, m) array whose entry [i, j] is the number of voters who
+        rank the i-th candidate above the j-th, see Profile.getPairwiseMatrix().
+    :ivar int state: The bitmask of remaining candidates that the scores are kept for.
+    :ivar list<int> scores: The Baldwin score of each candidate in the state.
+    """
+
+    def __init__(self, pairwiseMatrix):
+        EliminationScorer.__init__(self, pairwiseMatrix.shape[0])
+        self.pairwiseMatrix = np.asarray(pairwiseMatrix, dtype=np.int64)
+        self.columns = self.pairwiseMatrix.T.tolist()
+        self.state = None
+
+    def reset(self, state):
+        """
+        Computes the scores of the state from scratch.
+
+        :ivar int state: A bitmask of remaining candidates.
+        """
+
+        self.state = state
+        self.scores = self.pairwiseMatrix[:, stateToIndices(state)].sum(axis=1).tolist()
+
+    def getScores(self, state):
+        if state != self.state:
+            self.reset(state)
+        return self.scores
+
+    def advance(self, state, cand):
+        if state != self.state:
+            self.reset(state)
+        self.scores = [score - above for score, above in zip(self.scores, self.columns[cand])]
+        self.state = state & ~(1 << cand)
+
+    def retreat(self, state, cand):
+        self.scores = [score + above for score, above in zip(self.scores, self.columns[cand])]
+        self.state = state
+
+
+class SearchStats():
+    """
+    The statistics of an elimination search.
+
+    :ivar int numNodes: The number of states expanded, that is, whose losers were computed.
+    :ivar int numVisited: The number of states in the visited tables.
+    :ivar bool complete: False if the search stopped at its time or node budget before it was
+        over, in which case the winners found are only some of the winners.
+    """
+
+    def __init__(self):
+        self.numNodes = 0
+        self.numVisited = 0
+        self.complete = True
+
+
+def searchFrom(scorer, startState, knownWinners, visited, stats, withinBudget, update = None,
+        updateInterval = 1000):
+    """
+    Runs the depth-first search of eliminationSearch() from one state and returns the bitmask of
+    the known winners with the winners it found added.
+
+    :ivar EliminationScorer scorer: The scores of the rule.
+    :ivar int startState: The bitmask of the candidates at the start.
+    :ivar int knownWinners: The bitmask of the candidates already known to win.
+    :ivar set<int> visited: The states reached before, which are not expanded again. The states
+        reached by the search are added to it.
+    :ivar SearchStats stats: The statistics to update. stats.complete is set to False if the
+        budget runs out.
+    :ivar function withinBudget: Called before each state is expanded. Returns False once the
+        budget has run out.
+    :ivar function update: If given, called with the bitmask of the known winners every
+        updateInterval expanded states. Returns the bitmask of the known winners to go on with.
+    :ivar int updateInterval: The number of expanded states between calls to update.
+    """
+
+    # Each frame holds a state, the candidates that can be removed from it and the position of
+    # the next one to try.
+    frames = []
+
+    def enter(state, knownWinners):
+        if state & (state - 1) == 0:
+            return knownWinners | state
+        if state & ~knownWinners != 0:
+            if not withinBudget():
+                stats.complete = False
+            else:
+                frames.append([state, scorer.getLosers(state), 0])
+                stats.numNodes += 1
+                if update is not None and stats.numNodes % updateInterval == 0:
+                    knownWinners = update(knownWinners)
+        return knownWinners
+
+    knownWinners = enter(startState, knownWinners)
+    while frames and stats.complete:
+        frame = frames[-1]
+        state, losers, position = frame
+        if position == len(losers) or state & ~knownWinners == 0:
+            frames.pop()
+            if frames:
+                parent = frames[-1]
+                scorer.retreat(parent[0], parent[1][parent[2] - 1])
+            continue
+
+        frame[2] = position + 1
+        cand = losers[position]
+        childState = state & ~(1 << cand)
+        if childState in visited:
+            continue
+        visited.add(childState)
+        scorer.advance(state, cand)
+        numFrames = len(frames)
+        knownWinners = enter(childState, knownWinners)
+        if len(frames) == numFrames:
+            scorer.retreat(state, cand)
+
+    return knownWinners
+
+
+def eliminationSearch(scorer, startState, timeout = None, maxNodes = None, progress = None,
+        progressInterval = 1000):
+    """
+    Returns a bitmask of all the candidates who win in some order of elimination from the start
+    state, where each round removes one of the candidates given by scorer.getLosers(), and the
+    SearchStats of the search.
+
+    The search is depth-first. A state that has been reached before is not expanded again, and a
+    state whose remaining candidates are all known winners is not expanded at all, since it
+    cannot lead to a new winner.
+
+    The search can be given a budget of time and of expanded states. When a budget runs out the
+    search stops and returns the winners found so far, with stats.complete set to False.
+
+    :ivar EliminationScorer scorer: The scores of the rule.
+    :ivar int startState: The bitmask of the candidates at the start.
+    :ivar float timeout: The number of seconds the search may take, or None for no limit.
+    :ivar int maxNodes: The number of states the search may expand, or None for no limit.
+    :ivar function progress: If given, called with the number of states expanded, the number of
+        states visited and the bitmask of the winners found so far, every progressInterval
+        expanded states and once when the search ends.
+    :ivar int progressInterval: The number of expanded states between calls to progress.
+    """
+
+    stats = SearchStats()
+    if timeout is not None:
+        end = time.perf_counter() + timeout
+    visited = set([startState])
+
+    def withinBudget():
+        if maxNodes is not None and stats.numNodes >= maxNodes:
+            return False
+        return timeout is None or time.perf_counter() <= end
+
+    update = None
+    if progress is not None:
+        def update(knownWinners):
+            progress(stats.numNodes, len(visited), knownWinners)
+            return knownWinners
+
+    knownWinners = searchFrom(scorer, startState, 0, visited, stats, withinBudget, update,
+        progressInterval)
+    stats.numVisited = len(visited)
+    if progress is not None:
+        progress(stats.numNodes, stats.numVisited, knownWinners)
+    return knownWinners, stats
+
+
+def getRoots(scorer, startState, numRoots, visited, withinBudget, stats):
+    """
+    Expands the states reachable from the start state in breadth-first order until at least
+    numRoots states are waiting to be expanded, or numRoots states have been expanded, which
+    bounds the work done before the search is split on narrow trees. Returns the list of the
+    waiting states and the bitmask of the winners found on the way.
+
+    :ivar EliminationScorer scorer: The scores of the rule.
+    :ivar int startState: The bitmask of the candidates at the start.
+    :ivar int numRoots: The number of states wanted.
+    :ivar set<int> visited: The states reached before. The states reached on the way, the start
+        state included, are added to it.
+    :ivar function withinBudget: Called before each state is expanded. Returns False once the
+        budget has run out.
+    :ivar SearchStats stats: The statistics to update.
+    """
+
+    knownWinners = 0
+    visited.add(startState)
+    roots = collections.deque([startState])
+    expanded = 0
+    while roots and len(roots) < numRoots and expanded < numRoots:
+        state = roots.popleft()
+        if state & (state - 1) == 0:
+            knownWinners |= state
+            continue
+        if not withinBudget():
+            stats.complete = False
+            roots.clear()
+            break
+        expanded += 1
+        stats.numNodes += 1
+        for cand in scorer.getLosers(state):
+            childState = state & ~(1 << cand)
+            if childState in visited:
+                continue
+            visited.add(childState)
+            if childState & (childState - 1) == 0:
+                knownWinners |= childState
+            else:
+                roots.append(childState)
+    stats.numVisited = len(visited)
+    return list(roots), knownWinners
+
+
+# The largest number of candidates whose states parallelEliminationSearch() keeps in a shared
+# bitmap, which takes 2^m bits, here 128 MB.
+MAX_SHARED_VISITED_CANDS = 30
+
+
+class SharedVisitedSet():
+    """
+    The states visited by the workers of parallelEliminationSearch(), kept as a bitmap in shared
+    memory with one bit for each bitmask of candidates. It supports the in operator and add() of
+    a set, so searchFrom() can use it as its table of visited states. A worker that finds a state
+    in it skips the state, since the worker that added it searches it.
+
+    Bits are set without a lock. When two workers set bits of the same byte at once one of them
+    may be lost, which only lets a state be expanded twice.
+
+    :ivar RawArray bitmap: The bit of each visited state.
+    :ivar int numAdded: The number of states added by the current process.
+    """
+
+    def __init__(self, numCands):
+        self.bitmap = multiprocessing.RawArray("B", ((1 << numCands) + 7) // 8)
+        self.numAdded = 0
+
+    def __contains__(self, state):
+        return self.bitmap[state >> 3] >> (state & 7) & 1 == 1
+
+    def __len__(self):
+        return self.numAdded
+
+    def add(self, state):
+        self.bitmap[state >> 3] |= 1 << (state & 7)
+        self.numAdded += 1
+
+
+class SharedSearchState():
+    """
+    The objects shared by the workers of parallelEliminationSearch().
+
+    :ivar list<int> roots: The states the workers search from.
+    :ivar SharedVisitedSet visited: The states visited by all the workers.
+    :ivar Value nextRoot: The position of the next root that no worker has taken.
+    :ivar Array knownWinners: The bitmap of the candidates known to win.
+    :ivar Value numNodes: The number of states expanded by all the workers, updated every few
+        states by each of them.
+    :ivar Array numVisited: The number of states visited by each worker.
+    :ivar RawValue stopped: Set to 1 when a budget runs out.
+    :ivar float deadline: The time.monotonic() value at which the search stops, or None.
+    :ivar int maxNodes: The number of states the search may expand, or None for no limit.
+    """
+
+    def __init__(self, roots, visited, processes, numCands, timeout, maxNodes):
+        self.roots = roots
+        self.visited = visited
+        self.nextRoot = multiprocessing.Value("q", 0)
+        self.knownWinners = multiprocessing.Array("B", (numCands + 7) // 8)
+        self.numNodes = multiprocessing.Value("q", 0)
+        self.numVisited = multiprocessing.Array("q", processes)
+        self.stopped = multiprocessing.RawValue("b", 0)
+        self.deadline = None
+        if timeout is not None:
+            self.deadline = time.monotonic() + timeout
+        self.maxNodes = maxNodes
+
+    def takeRoot(self):
+        """
+        Returns the next root that no worker has taken, or None if there is none left.
+        """
+
+        with self.nextRoot.get_lock():
+            position = self.nextRoot.value
+            self.nextRoot.value += 1
+        if position < len(self.roots):
+            return self.roots[position]
+        return None
+
+    def getKnownWinners(self):
+        """
+        Returns the bitmask of the candidates known to win. Winners found while the bitmap is
+        being read may be missed, which only makes the pruning weaker.
+        """
+
+        return int.from_bytes(bytes(self.knownWinners.get_obj()), "little")
+
+    def addKnownWinners(self, knownWinners):
+        """
+        Sets the bits of the candidates of a bitmask of winners in the bitmap, and returns the
+        bitmask of all the candidates known to win.
+        """
+
+        shared = self.getKnownWinners()
+        if knownWinners & ~shared:
+            with self.knownWinners.get_lock():
+                for i, byte in enumerate(knownWinners.to_bytes(len(self.knownWinners), "little")):
+                    self.knownWinners[i] |= byte
+        return shared | knownWinners
+
+
+def searchRoots(index, scorer, shared, syncInterval):
+    """
+    The loop run by each worker of parallelEliminationSearch(). The worker takes the roots one at
+    a time and searches each of them depth-first, as eliminationSearch() does, until none is left
+    or a budget runs out.
+
+    :ivar int index: The index of the worker.
+    :ivar EliminationScorer scorer: The scores of the rule.
+    :ivar SharedSearchState shared: The objects shared by the workers.
+    :ivar int syncInterval: The number of states the worker expands between two exchanges of its
+        counts and known winners with the other workers.
+    """
+
+    try:
+        searchSharedRoots(index, scorer, shared, syncInterval)
+    except:
+        # Stop the other workers, whose results would be incomplete.
+        shared.stopped.value = 1
+        raise
+
+
+def searchSharedRoots(index, scorer, shared, syncInterval):
+    """
+    The body of searchRoots().
+    """
+
+    stats = SearchStats()
+    visited = shared.visited
+    # The number of the states expanded by this worker that were added to shared.numNodes.
+    counted = 0
+
+    def withinBudget():
+        if shared.stopped.value:
+            return False
+        numNodes = shared.numNodes.value + stats.numNodes - counted
+        if (shared.maxNodes is not None and numNodes >= shared.maxNodes) or (
+                shared.deadline is not None and time.monotonic() > shared.deadline):
+            shared.stopped.value = 1
+            return False
+        return True
+
+    def update(knownWinners):
+        nonlocal counted
+        with shared.numNodes.get_lock():
+            shared.numNodes.value += stats.numNodes - counted
+        counted = stats.numNodes
+        shared.numVisited[index] = len(visited)
+        return shared.addKnownWinners(knownWinners)
+
+    knownWinners = shared.getKnownWinners()
+    while stats.complete:
+        root = shared.takeRoot()
+        if root is None:
+            break
+        knownWinners = searchFrom(scorer, root, knownWinners, visited, stats, withinBudget, update,
+            syncInterval)
+        knownWinners = update(knownWinners)
+    update(knownWinners)
+
+
+def parallelEliminationSearch(scorer, startState, processes = None, rootsPerProcess = 16,
+        syncInterval = 64, timeout = None, maxNodes = None, progress = None,
+        progressInterval = 1000):
+    """
+    Returns the same bitmask and SearchStats as eliminationSearch(), found by several worker
+    processes. The search is first expanded breadth-first until about rootsPerProcess states for
+    each worker are waiting to be expanded. Each worker then takes these roots one at a time and
+    searches them depth-first with the pruning of eliminationSearch(). The table of visited states
+    is a SharedVisitedSet, so a state reached from the roots of several workers is expanded by
+    only one of them. The known winners are shared through a bitmap in shared memory, which every
+    worker merges into its own every syncInterval expanded states.
+
+    The visited bitmap takes 2^m bits for m candidates, so searches over more than
+    MAX_SHARED_VISITED_CANDS candidates are run by eliminationSearch() in the current process.
+
+    :ivar EliminationScorer scorer: The scores of the rule. Each worker gets its own copy.
+    :ivar int startState: The bitmask of the candidates at the start.
+    :ivar int processes: The number of worker processes. Defaults to the number of processors.
+    :ivar int rootsPerProcess: The number of roots wanted for each worker.
+    :ivar int syncInterval: The number of states a worker expands between two exchanges with the
+        other workers.
+    :ivar float timeout: The number of seconds the search may take, or None for no limit.
+    :ivar int maxNodes: The number of states the search may expand, or None for no limit. The
+        workers share their counts every syncInterval states, so they may expand a few more.
+    :ivar function progress: If given, called as by eliminationSearch(), about every
+        progressInterval expanded states and once when the search ends. The counts of the workers
+        are read every syncInterval states, so the calls may come a little late.
+    :ivar int progressInterval: The number of expanded states between calls to progress.
+    """
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1 or startState.bit_length() > MAX_SHARED_VISITED_CANDS:
+        return eliminationSearch(scorer, startState, timeout, maxNodes, progress)
+
+    stats = SearchStats()
+    deadline = None
+    if timeout is not None:
+        deadline = time.monotonic() + timeout
+
+    def withinBudget():
+        if maxNodes is not None and stats.numNodes >= maxNodes:
+            return False
+        return deadline is None or time.monotonic() <= deadline
+
+    # A small node budget is not spent on splitting the search, so the workers can still go deep
+    # enough to find winners.
+    numRoots = rootsPerProcess * processes
+    if maxNodes is not None:
+        numRoots = max(1, min(numRoots, maxNodes // 2))
+    visited = set()
+    roots, knownWinners = getRoots(scorer, startState, numRoots, visited, withinBudget, stats)
+    if roots:
+        sharedVisited = SharedVisitedSet(startState.bit_length())
+        for state in visited:
+            sharedVisited.add(state)
+        remainingNodes = None
+        if maxNodes is not None:
+            remainingNodes = maxNodes - stats.numNodes
+        remainingTime = None
+        if deadline is not None:
+            remainingTime = deadline - time.monotonic()
+        shared = SharedSearchState(roots, sharedVisited, processes, startState.bit_length(),
+            remainingTime, remainingNodes)
+        shared.addKnownWinners(knownWinners)
+        workers = []
+        for index in range(0, min(processes, len(roots))):
+            worker = multiprocessing.Process(target=searchRoots,
+                args=(index, scorer, shared, syncInterval))
+            worker.start()
+            workers.append(worker)
+        numReported = stats.numNodes // progressInterval
+        for worker in workers:
+            while worker.is_alive():
+                # The workers are polled often enough that progress is not held back by much.
+                worker.join(0.05)
+                numNodes = stats.numNodes + shared.numNodes.value
+                if (progress is not None and worker.is_alive()
+                        and numNodes // progressInterval > numReported):
+                    numReported = numNodes // progressInterval
+                    progress(numNodes, stats.numVisited + sum(shared.numVisited),
+                        shared.getKnownWinners())
+        for worker in workers:
+            if worker.exitcode != 0:
+                raise RuntimeError("a search process exited with code %d" % worker.exitcode)
+
+        stats.numNodes += shared.numNodes.value
+        stats.numVisited += sum(shared.numVisited)
+        stats.complete = stats.complete and shared.stopped.value == 0
+        knownWinners = shared.getKnownWinners()
+    if progress is not None:
+        progress(stats.numNodes, stats.numVisited, knownWinners)
+    return knownWinners, stats
+
+
+def getEliminationWinners(profile, scorer, startState = None, processes = 1, timeout = None,
+        maxNodes = None, progress = None, progressInterval = 1000):
+    """
+    Returns a sorted list of the integer representations of all the candidates who win in some
+    order of elimination, see eliminationSearch(), and the SearchStats of the search.
+
+    :ivar Profile profile: A Profile object that represents an election profile.
+    :ivar EliminationScorer scorer: The scores of the rule, over the candidates of
+        profile.getCandList().
+    :ivar int startState: The bitmask of the candidates at the start. Defaults to all of them.
+    :ivar int processes: The number of processes that search, see parallelEliminationSearch().
+    :ivar float timeout: The number of seconds the search may take, or None for no limit.
+    :ivar int maxNodes: The number of states the search may expand, or None for no limit.
+    :ivar function progress: If given, called with the number of states expanded, the number of
+        states visited and the sorted list of the winners found so far, every progressInterval
+        expanded states and once when the search ends.
+    :ivar int progressInterval: The number of expanded states between calls to progress.
+    """
+
+    candList = profile.getCandList()
+    if startState is None:
+        startState = (1 << len(candList)) - 1
+    reportProgress = None
+    if progress is not None:
+        def reportProgress(numNodes, numVisited, knownWinners):
+            progress(numNodes, numVisited, [candList[i] for i in stateToIndices(knownWinners)])
+    if processes == 1:
+        winners, stats = eliminationSearch(scorer, startState, timeout, maxNodes, reportProgress,
+            progressInterval)
+    else:
+        winners, stats = parallelEliminationSearch(scorer, startState, processes,
+            timeout=timeout, maxNodes=maxNodes, progress=reportProgress,
+            progressInterval=progressInterval)
+    return [candList[i] for i in stateToIndices(winners)], stats
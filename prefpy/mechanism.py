@@ -7,9 +7,13 @@ import io
 import math
 import time
 from numpy import *
+import numpy as np
 import itertools
 from preference import Preference
 from profile import Profile
+import rankmatrix
+import pairwise
+import elimination
 import copy
 import sys
 import networkx as nx
@@ -139,23 +143,30 @@ class MechanismPosScoring(Mechanism):
             print("ERROR: unsupported election type")
             exit()
 
-        # Initialize our dictionary so that all candidates have a score of zero.
-        candScoresMap = dict()
-        for cand in profile.candMap.keys():
-            candScoresMap[cand] = 0.0
+        # The score of each candidate is the number of times it is ranked at each position weighted
+        # by the score of that position.
+        scoringVector = np.asarray(self.getScoringVector(profile), dtype=float)
+        scores = np.dot(profile.getPositionMatrix().astype(float), scoringVector)
 
-        rankMaps = profile.getRankMaps()
-        rankMapCounts = profile.getPreferenceCounts()
-        scoringVector = self.getScoringVector(profile)
+        return self.scoresToCandScoresMap(profile, scores)
+
+    def scoresToCandScoresMap(self, profile, scores):
+        """
+        Returns a dictonary that associates the integer representation of each candidate with its
+        entry of the given array of scores, ordered as the columns of the profile's rank matrix.
 
-        # Go through the rankMaps of the profile and increment each candidates score appropriately.
-        for i in range(0, len(rankMaps)):
-            rankMap = rankMaps[i]
-            rankMapCount = rankMapCounts[i]
-            for cand in rankMap.keys():
-                candScoresMap[cand] += scoringVector[rankMap[cand] - 1] * rankMapCount
+        :ivar Profile profile: A Profile object that represents an election profile.
+        :ivar ndarray scores: The score of each candidate.
+        """
 
-        # print("candScoresMap=", candScoresMap)
+        candIndex = dict()
+        candList = profile.getCandList()
+        for j in range(0, len(candList)):
+            candIndex[candList[j]] = j
+        scores = scores.tolist()
+        candScoresMap = dict()
+        for cand in profile.candMap.keys():
+            candScoresMap[cand] = float(scores[candIndex[cand]])
         return candScoresMap
 
     def getMov(self, profile):
@@ -177,39 +188,6 @@ class MechanismPlurality(MechanismPosScoring):
     def __init__(self):
         self.maximizeCandScore = True
 
-    def getCandScoresMap(self, profile):
-        """
-        Returns a dictonary that associates the integer representation of each candidate with the
-        score they recieved in the profile.
-
-        :ivar Profile profile: A Profile object that represents an election profile.
-        """
-
-        # Currently, we expect the profile to contain complete ordering over candidates.
-        elecType = profile.getElecType()
-        if elecType != "soc" and elecType != "toc":
-            print("ERROR: unsupported election type")
-            exit()
-
-        # Initialize our dictionary so that all candidates have a score of zero.
-        candScoresMap = dict()
-        for cand in profile.candMap.keys():
-            candScoresMap[cand] = 0.0
-
-        rankMaps = profile.getRankMaps()
-        rankMapCounts = profile.getPreferenceCounts()
-        scoringVector = self.getScoringVector(profile)
-
-        # Go through the rankMaps of the profile and increment each candidates score appropriately.
-        for i in range(0, len(rankMaps)):
-            rankMap = rankMaps[i]
-            rankMapCount = rankMapCounts[i]
-            for cand in rankMap.keys():
-                candScoresMap[cand] += scoringVector[rankMap[cand] - 1] * rankMapCount
-
-        # print("candScoresMap=", candScoresMap)
-        return candScoresMap
-
     def getScoringVector(self, profile):
         """
         Returns the scoring vector [1,0,0,...,0]. This function is called by getCandScoresMap()
@@ -247,25 +225,20 @@ class MechanismVeto(MechanismPosScoring):
             print("ERROR: unsupported election type")
             exit()
 
-        # Initialize our dictionary so that all candidates have a score of zero.
-        candScoresMap = dict()
-        for cand in profile.candMap.keys():
-            candScoresMap[cand] = 0.0
-
-        rankMaps = profile.getRankMaps()
-        rankMapCounts = profile.getPreferenceCounts()
+        # Each candidate scores a point in every vote that does not rank it in the last position.
+        # Without ties, the last position is always m.
+        if elecType == "soc":
+            positionMatrix = profile.getPositionMatrix()
+            scores = (positionMatrix.sum(axis=1) - positionMatrix[:, -1]).astype(float)
+            return self.scoresToCandScoresMap(profile, scores)
 
-        # Go through the rankMaps of the profile and increment each candidates score appropriately.
-        for i in range(0, len(rankMaps)):
-            rankMap = rankMaps[i]
-            rankMapCount = rankMapCounts[i]
-            maxpos = max(rankMap.values())
-            for cand in rankMap.keys():
-                if rankMap[cand] < maxpos:
-                    candScoresMap[cand] += rankMapCount
+        # With ties, the last position may be shared by several candidates and depends on the vote.
+        rankMatrix = profile.getRankMatrix()
+        counts = profile.getCountVector().astype(float)
+        notLast = rankMatrix < rankMatrix.max(axis=1)[:, None]
+        scores = np.dot(counts, notLast.astype(float))
 
-        # print("candScoresMap=", candScoresMap)
-        return candScoresMap
+        return self.scoresToCandScoresMap(profile, scores)
 
 
 class MechanismBorda(MechanismPosScoring):
@@ -324,6 +297,40 @@ class MechanismKApproval(MechanismPosScoring):
         return scoringVector
 
 
+def getPositionalScores(profile, scoringVectors):
+    """
+    Evaluates many scoring vectors against one profile at once. Returns a (V, m) array whose row v
+    holds the score of each candidate under the scoring vector in row v of scoringVectors, with
+    the candidates ordered as in profile.getCandList(), and a list that contains the list of
+    winning candidates of each scoring vector.
+
+    The number of voters who rank each candidate at each position is counted once, so each
+    scoring vector only costs a product with this m by m matrix.
+
+    :ivar Profile profile: A Profile object that represents an election profile.
+    :ivar ndarray scoringVectors: A (V, m) array with one scoring vector per row.
+    """
+
+    # Currently, we expect the profile to contain complete ordering over candidates.
+    elecType = profile.getElecType()
+    if elecType != "soc" and elecType != "toc":
+        print("ERROR: unsupported election type")
+        exit()
+
+    scoringVectors = np.atleast_2d(np.asarray(scoringVectors, dtype=float))
+    if scoringVectors.shape[1] != profile.numCands:
+        print("ERROR: scoring vector is not the correct length")
+        exit()
+
+    scores = np.dot(scoringVectors, profile.getPositionMatrix().T.astype(float))
+
+    candList = profile.getCandList()
+    winners = []
+    for row in scores:
+        winners.append([candList[j] for j in np.flatnonzero(row == row.max())])
+    return scores, winners
+
+
 class MechanismSimplifiedBucklin(Mechanism):
     """
     The simplified Bucklin mechanism.
@@ -346,21 +353,20 @@ class MechanismSimplifiedBucklin(Mechanism):
             print("ERROR: unsupported profile type")
             exit()
 
+        # We keep track of the number of times each candidate is ranked in the first t positions.
+        numTimesRanked = np.cumsum(profile.getPositionMatrix(), axis=1).tolist()
+        candList = profile.getCandList()
+        candIndex = dict()
+        for j in range(0, len(candList)):
+            candIndex[candList[j]] = j
+
         bucklinScores = dict()
-        rankMaps = profile.getRankMaps()
-        preferenceCounts = profile.getPreferenceCounts()
         for cand in profile.candMap.keys():
 
-            # We keep track of the number of times a candidate is ranked in the first t positions.
-            numTimesRanked = 0
-
-            # We increase t in increments of 1 until we find t such that the candidate is ranked in the
-            # first t positions in at least half the votes.
+            # We find the smallest t such that the candidate is ranked in the first t positions in at
+            # least half the votes.
             for t in range(1, profile.numCands + 1):
-                for i in range(0, len(rankMaps)):
-                    if (rankMaps[i][cand] == t):
-                        numTimesRanked += preferenceCounts[i]
-                if numTimesRanked >= math.ceil(float(profile.numVoters) / 2):
+                if numTimesRanked[candIndex[cand]][t - 1] >= math.ceil(float(profile.numVoters) / 2):
                     bucklinScores[cand] = t
                     break
 
@@ -401,28 +407,9 @@ class MechanismCopeland(Mechanism):
             print("ERROR: unsupported election type")
             exit()
 
-        # Initialize each Copeland score as 0.0.
-        copelandScores = dict()
-        for cand in profile.candMap.keys():
-            copelandScores[cand] = 0.0
-
-        preferenceCounts = profile.getPreferenceCounts()
-
-        # For each pair of candidates, calculate the number of votes in which one beat the other.
-        wmgMap = profile.getWmg()
-        for cand1, cand2 in itertools.combinations(wmgMap.keys(), 2):
-            if cand2 in wmgMap[cand1].keys():
-                if wmgMap[cand1][cand2] > 0:
-                    copelandScores[cand1] += 1.0
-                elif wmgMap[cand1][cand2] < 0:
-                    copelandScores[cand2] += 1.0
-
-                # If a pair of candidates is tied, we add alpha to their score for each vote.
-                else:
-                    copelandScores[cand1] += self.alpha
-                    copelandScores[cand2] += self.alpha
-
-        return copelandScores
+        # Each candidate scores 1 for each pairwise election it wins and alpha for each tie.
+        copelandScores = pairwise.getCopelandScores(profile.getWmgMatrix(), self.alpha)
+        return pairwise.scoresToMap(copelandScores, profile.getCandList(), profile.candMap.keys())
 
 
 class MechanismMaximin(Mechanism):
@@ -448,20 +435,9 @@ class MechanismMaximin(Mechanism):
             print("ERROR: unsupported election type")
             exit()
 
-        wmg = profile.getWmg()
-
-        # Initialize the maximin score for each candidate as infinity.
-        maximinScores = dict()
-        for cand in wmg.keys():
-            maximinScores[cand] = float("inf")
-
-        # For each pair of candidates, calculate the number of times each beats the other.
-        for cand1, cand2 in itertools.combinations(wmg.keys(), 2):
-            if cand2 in wmg[cand1].keys():
-                maximinScores[cand1] = min(maximinScores[cand1], wmg[cand1][cand2])
-                maximinScores[cand2] = min(maximinScores[cand2], wmg[cand2][cand1])
-
-        return maximinScores
+        # The maximin score of each candidate is its smallest margin against another candidate.
+        maximinScores = pairwise.getMaximinScores(profile.getWmgMatrix())
+        return pairwise.scoresToMap(maximinScores, profile.getCandList(), profile.candMap.keys())
 
 
 class MechanismSchulze(Mechanism):
@@ -472,6 +448,28 @@ class MechanismSchulze(Mechanism):
     def __init__(self):
         self.maximizeCandScore = True
 
+    def computeStrongestPathMatrix(self, pairwiseMatrix):
+        """
+        Returns an (m, m) int64 array whose entry [i, j] is the strength of the strongest path from
+        the i-th candidate to the j-th candidate, given the pairwise preference counts in the same
+        order.
+
+        The strongest paths are found by the widest path variant of the Floyd-Warshall algorithm,
+        where each intermediate candidate k updates the whole matrix at once.
+
+        :ivar ndarray pairwiseMatrix: An (m, m) array whose entry [i, j] is the number of voters who
+            prefer the i-th candidate to the j-th candidate.
+        """
+
+        pairwiseMatrix = np.asarray(pairwiseMatrix, dtype=np.int64)
+        strongestPaths = np.where(pairwiseMatrix > pairwiseMatrix.T, pairwiseMatrix, 0)
+        np.fill_diagonal(strongestPaths, 0)
+        for k in range(0, len(strongestPaths)):
+            strongestPaths = np.maximum(strongestPaths, np.minimum(strongestPaths[:, k, None],
+                strongestPaths[None, k, :]))
+        np.fill_diagonal(strongestPaths, 0)
+        return strongestPaths
+
     def computeStrongestPaths(self, profile, pairwisePreferences):
         """
         Returns a two-dimensional dictionary that associates every pair of candidates, cand1 and
@@ -482,72 +480,28 @@ class MechanismSchulze(Mechanism):
             associates every pair of candidates, cand1 and cand2, with number of voters who prefer
             cand1 to cand2.
         """
-        cands = profile.candMap.keys()
-        numCands = len(cands)
 
-        # Initialize the two-dimensional dictionary that will hold our strongest paths.
-        strongestPaths = dict()
-        for cand in cands:
-            strongestPaths[cand] = dict()
+        candList = profile.getCandList()
+        pairwiseMatrix = np.zeros((len(candList), len(candList)), dtype=np.int64)
+        for i in range(0, len(candList)):
+            for j in range(0, len(candList)):
+                if i != j:
+                    pairwiseMatrix[i, j] = pairwisePreferences[candList[i]][candList[j]]
 
-        for i in range(1, numCands + 1):
-            for j in range(1, numCands + 1):
-                if (i == j):
-                    continue
-                if pairwisePreferences[i][j] > pairwisePreferences[j][i]:
-                    strongestPaths[i][j] = pairwisePreferences[i][j]
-                else:
-                    strongestPaths[i][j] = 0
-
-        for i in range(1, numCands + 1):
-            for j in range(1, numCands + 1):
-                if (i == j):
-                    continue
-                for k in range(1, numCands + 1):
-                    if (i == k or j == k):
-                        continue
-                    strongestPaths[j][k] = max(strongestPaths[j][k], min(strongestPaths[j][i], strongestPaths[i][k]))
-
-        return strongestPaths
+        strongestPaths = self.computeStrongestPathMatrix(pairwiseMatrix)
+        return rankmatrix.wmgMatrixToMap(strongestPaths, candList)
 
     def computePairwisePreferences(self, profile):
         """
         Returns a two-dimensional dictionary that associates every pair of candidates, cand1 and
-        cand2, with number of voters who prefer cand1 to cand2.
+        cand2, with number of voters who prefer cand1 to cand2. If either candidate was unranked,
+        we assume that they are lower ranked than all ranked candidates.
 
         :ivar Profile profile: A Profile object that represents an election profile.
         """
 
-        cands = profile.candMap.keys()
-
-        # Initialize the two-dimensional dictionary that will hold our pairwise preferences.
-        pairwisePreferences = dict()
-        for cand in cands:
-            pairwisePreferences[cand] = dict()
-        for cand1 in cands:
-            for cand2 in cands:
-                if cand1 != cand2:
-                    pairwisePreferences[cand1][cand2] = 0
-
-        for preference in profile.preferences:
-            wmgMap = preference.wmgMap
-            for cand1, cand2 in itertools.combinations(cands, 2):
-
-                # If either candidate was unranked, we assume that they are lower ranked than all
-                # ranked candidates.
-                if cand1 not in wmgMap.keys():
-                    if cand2 in wmgMap.keys():
-                        pairwisePreferences[cand2][cand1] += 1 * preference.count
-                elif cand2 not in wmgMap.keys():
-                    if cand1 in wmgMap.keys():
-                        pairwisePreferences[cand1][cand2] += 1 * preference.count
-
-                elif wmgMap[cand1][cand2] == 1:
-                    pairwisePreferences[cand1][cand2] += 1 * preference.count
-                elif wmgMap[cand1][cand2] == -1:
-                    pairwisePreferences[cand2][cand1] += 1 * preference.count
-
-        return pairwisePreferences
+        pairwiseMatrix = profile.getPairwiseMatrix(unrankedLast=True)
+        return rankmatrix.wmgMatrixToMap(pairwiseMatrix, profile.getCandList())
 
     def getCandScoresMap(self, profile):
         """
@@ -558,22 +512,17 @@ class MechanismSchulze(Mechanism):
         :ivar Profile profile: A Profile object that represents an election profile.
         """
 
-        cands = profile.candMap.keys()
-        pairwisePreferences = self.computePairwisePreferences(profile)
-        strongestPaths = self.computeStrongestPaths(profile, pairwisePreferences)
+        candList = profile.getCandList()
+        strongestPaths = self.computeStrongestPathMatrix(profile.getPairwiseMatrix(unrankedLast=True))
 
-        # For each candidate, determine how many times p[E,X] >= p[X,E] using a variant of the
-        # Floyd-Warshall algorithm.
-        betterCount = dict()
-        for cand in cands:
-            betterCount[cand] = 0
-        for cand1 in cands:
-            for cand2 in cands:
-                if cand1 == cand2:
-                    continue
-                if strongestPaths[cand1][cand2] >= strongestPaths[cand2][cand1]:
-                    betterCount[cand1] += 1
+        # For each candidate, determine how many times p[E,X] >= p[X,E].
+        better = strongestPaths >= strongestPaths.T
+        np.fill_diagonal(better, False)
+        betterCounts = better.sum(axis=1).tolist()
 
+        betterCount = dict()
+        for i in range(0, len(candList)):
+            betterCount[candList[i]] = betterCounts[i]
         return betterCount
 
 
@@ -606,11 +555,59 @@ def getKendallTauScore(myResponse, otherResponse):
     return kt
 
 
-class MechanismSTV():
+class MechanismElimination():
+    """
+    The common part of the mechanisms whose winners are found by searching the orders of
+    elimination, see elimination.eliminationSearch().
+
+    The search can be given a budget, as the TIMEOUT of MechanismRankedPairs. When a budget runs
+    out the winners found so far are returned and self.stats.complete is False.
+
+    :ivar int processes: The number of processes that search for the winners, see
+        elimination.parallelEliminationSearch().
+    :ivar float TIMEOUT: The number of seconds a search may take, or None for no limit.
+    :ivar int MAX_NODES: The number of states a search may expand, or None for no limit.
+    :ivar function progress: If given, called with the number of states expanded, the number of
+        states visited and the sorted list of the winners found so far, every progressInterval
+        expanded states and once when the search ends.
+    :ivar int progressInterval: The number of expanded states between calls to progress.
+    :ivar SearchStats stats: The statistics of the last search.
+    """
+
+    def __init__(self, processes=1, timeout=None, maxNodes=None, progress=None,
+                 progressInterval=1000):
+        self.processes = processes
+        self.TIMEOUT = timeout
+        self.MAX_NODES = maxNodes
+        self.progress = progress
+        self.progressInterval = progressInterval
+        self.stats = None
+
+    def searchWinners(self, profile, scorer, startState=None):
+        """
+        Returns a sorted list of all the candidates who win in some order of elimination, within
+        the budget of the search.
+
+        :ivar Profile profile: A Profile object that represents an election profile.
+        :ivar EliminationScorer scorer: The scores of the rule.
+        :ivar int startState: The bitmask of the candidates at the start. Defaults to all of them.
+        """
+        winners, self.stats = elimination.getEliminationWinners(profile, scorer, startState,
+            self.processes, self.TIMEOUT, self.MAX_NODES, self.progress, self.progressInterval)
+        return winners
+
+
+class MechanismSTV(MechanismElimination):
     """
     The STV mechanism.
     """
 
+    def getScorer(self, profile):
+        """
+        Returns the plurality scorer of the profile used by the search.
+        """
+        return elimination.IncrementalPluralityScorer(profile.getRankMatrix(), profile.getCountVector())
+
     def STVwinners(self, profile):
         elecType = profile.getElecType()
         if elecType == "soc" or elecType == "csv":
@@ -627,57 +624,9 @@ class MechanismSTV():
 
         :ivar Profile profile: A Profile object that represents an election profile.
         """
-        ordering = profile.getOrderVectors()
-        prefcounts = profile.getPreferenceCounts()
-        m = profile.numCands
-
-        if min(ordering[0]) == 0:
-            startstate = set(range(m))
-        else:
-            startstate = set(range(1, m + 1))
-
-        ordering, startstate = self.preprocessing(ordering, prefcounts, m, startstate)
-        m_star = len(startstate)
-        known_winners = set()
-        # ----------Some statistics--------------
-        hashtable2 = set()
-
-        # push the node of start state into the priority queue
-        root = Node(value=startstate)
-        stackNode = []
-        stackNode.append(root)
-
-        while stackNode:
-            # ------------pop the current node-----------------
-            node = stackNode.pop()
-            # -------------------------------------------------
-            state = node.value.copy()
-
-            # use heuristic to delete all the candidates which satisfy the following condition
-
-            # goal state 1: if the state set contains only 1 candidate, then stop
-            if len(state) == 1 and list(state)[0] not in known_winners:
-                known_winners.add(list(state)[0])
-                continue
-            # goal state 2 (pruning): if the state set is subset of the known_winners set, then stop
-            if state <= known_winners:
-                continue
-            # ----------Compute plurality score for the current remaining candidates--------------
-            plural_score = self.get_plurality_scores3(prefcounts, ordering, state, m_star)
-            minscore = min(plural_score.values())
-            for to_be_deleted in state:
-                if plural_score[to_be_deleted] == minscore:
-                    child_state = state.copy()
-                    child_state.remove(to_be_deleted)
-                    tpc = tuple(sorted(child_state))
-                    if tpc in hashtable2:
-                        continue
-                    else:
-                        hashtable2.add(tpc)
-                        child_node = Node(value=child_state)
-                        stackNode.append(child_node)
-
-        return sorted(known_winners)
+        scorer = self.getScorer(profile)
+        startState = self.preprocessing(scorer, (1 << profile.numCands) - 1)
+        return self.searchWinners(profile, scorer, startState)
 
     def STVtocwinners(self, profile):
         """
@@ -685,109 +634,43 @@ class MechanismSTV():
 
         :ivar Profile profile: A Profile object that represents an election profile.
         """
-        ordering = profile.getOrderVectors()
-        prefcounts = profile.getPreferenceCounts()
-        len_prefcounts = len(prefcounts)
-        m = profile.numCands
-        rankmaps = profile.getRankMaps()
-        if min(ordering[0]) == 0:
-            startstate = set(range(m))
-        else:
-            startstate = set(range(1, m + 1))
+        scorer = self.getScorer(profile)
+        return self.searchWinners(profile, scorer)
 
-        # ordering, startstate = self.preprocessing(ordering, prefcounts, m, startstate)
-        # m_star = len(startstate)
-        known_winners = set()
-        # ----------Some statistics--------------
-        hashtable2 = set()
-        root = Node(value=startstate)
-        stackNode = []
-        stackNode.append(root)
-
-        while stackNode:
-            # ------------pop the current node-----------------
-            node = stackNode.pop()
-            # -------------------------------------------------
-            state = node.value.copy()
-
-            # use heuristic to delete all the candidates which satisfy the following condition
-
-            # goal state 1: if the state set contains only 1 candidate, then stop
-            if len(state) == 1 and list(state)[0] not in known_winners:
-                known_winners.add(list(state)[0])
-                continue
-            # goal state 2 (pruning): if the state set is subset of the known_winners set, then stop
-            if state <= known_winners:
-                continue
-            # ----------Compute plurality score for the current remaining candidates--------------
-            plural_score = self.get_plurality_scores4(prefcounts, rankmaps, state)
-            minscore = min(plural_score.values())
-            for to_be_deleted in state:
-                if plural_score[to_be_deleted] == minscore:
-                    child_state = state.copy()
-                    child_state.remove(to_be_deleted)
-                    tpc = tuple(sorted(child_state))
-                    if tpc in hashtable2:
-                        continue
-                    else:
-                        hashtable2.add(tpc)
-                        child_node = Node(value=child_state)
-                        stackNode.append(child_node)
-
-        return sorted(known_winners)
-
-    def preprocessing(self, ordering, prefcounts, m, startstate):
-        plural_score = self.get_plurality_scores3(prefcounts, ordering, startstate, m)
-        state = set([key for key, value in plural_score.items() if value != 0])
-        ordering = self.construct_ordering(ordering, prefcounts, state)
-        plural_score = dict([(key, value) for key, value in plural_score.items() if value != 0])
-        minscore = min(plural_score.values())
-        to_be_deleted = [key for key, value in plural_score.items() if value == minscore]
-        if len(to_be_deleted) > 1:
-            return ordering, state
-        else:
-            while len(to_be_deleted) == 1 and len(state) > 1:
-                state.remove(to_be_deleted[0])
-                plural_score = self.get_plurality_scores3(prefcounts, ordering, state, m)
-                minscore = min(plural_score.values())
-                to_be_deleted = [key for key, value in plural_score.items() if value == minscore]
-            ordering = self.construct_ordering(ordering, prefcounts, state)
-            return ordering, state
-
-    def construct_ordering(self, ordering, prefcounts, state):
-        new_ordering = []
-        for i in range(len(prefcounts)):
-            new_ordering.append([x for x in ordering[i] if x in state])
-        return new_ordering
-
-    def get_plurality_scores3(self, prefcounts, ordering, state, m):
-        plural_score = {}
-        plural_score = plural_score.fromkeys(state, 0)
-        for i in range(len(prefcounts)):
-            for j in range(m):
-                if ordering[i][j] in state:
-                    plural_score[ordering[i][j]] += prefcounts[i]
-                    break
-        return plural_score
-
-    def get_plurality_scores4(self, prefcounts, rankmaps, state):
-        plural_score = {}
-        plural_score = plural_score.fromkeys(state, 0)
-        for i in range(len(prefcounts)):
-            temp = list(filter(lambda x: x[0] in state, list(rankmaps[i].items())))
-            min_value = min([value for key, value in temp])
-            for j in state:
-                if rankmaps[i][j] == min_value:
-                    plural_score[j] += prefcounts[i]
+    def preprocessing(self, scorer, state):
+        """
+        Returns the state left after removing the candidates that every elimination order removes
+        first: those ranked first by no voter, and then, one at a time, the candidate with the
+        lowest plurality score as long as it is the only one. The candidates are removed through
+        scorer.advance(), so the scorer is left at the returned state.
 
-        return plural_score
+        :ivar EliminationScorer scorer: The plurality scores of the profile.
+        :ivar int state: A bitmask of remaining candidates.
+        """
+        scores = scorer.getScores(state)
+        for cand in elimination.stateToIndices(state):
+            if scores[cand] == 0:
+                scorer.advance(state, cand)
+                state &= ~(1 << cand)
+        to_be_deleted = scorer.getLosers(state)
+        while len(to_be_deleted) == 1 and state & (state - 1) != 0:
+            scorer.advance(state, to_be_deleted[0])
+            state &= ~(1 << to_be_deleted[0])
+            to_be_deleted = scorer.getLosers(state)
+        return state
 
 
-class MechanismBaldwin():
+class MechanismBaldwin(MechanismElimination):
     """
     The Baldwin mechanism.
     """
 
+    def getScorer(self, profile):
+        """
+        Returns the Borda scorer of the profile used by the search.
+        """
+        return elimination.IncrementalBordaScorer(profile.getPairwiseMatrix())
+
     def baldwin_winners(self, profile):
         elecType = profile.getElecType()
         if elecType == "soc" or elecType == "csv":
@@ -804,61 +687,8 @@ class MechanismBaldwin():
 
         :ivar Profile profile: A Profile object that represents an election profile.
         """
-        ordering = profile.getOrderVectors()
-        m = profile.numCands
-        prefcounts = profile.getPreferenceCounts()
-        if min(ordering[0]) == 0:
-            startstate = set(range(m))
-        else:
-            startstate = set(range(1, m + 1))
-        wmg = self.getWmg2(prefcounts, ordering, startstate, normalize=False)
-        known_winners = set()
-        # ----------Some statistics--------------
-        hashtable2 = set()
-
-        # push the node of start state into the priority queue
-        root = Node(value=startstate)
-        stackNode = []
-        stackNode.append(root)
-
-        while stackNode:
-            # ------------pop the current node-----------------
-            node = stackNode.pop()
-            # -------------------------------------------------
-            state = node.value.copy()
-
-            # goal state 1: if the state set contains only 1 candidate, then stop
-            if len(state) == 1 and list(state)[0] not in known_winners:
-                known_winners.add(list(state)[0])
-                continue
-            # goal state 2 (pruning): if the state set is subset of the known_winners set, then stop
-            if state <= known_winners:
-                continue
-            # ----------Compute plurality score for the current remaining candidates--------------
-            plural_score = dict()
-            for cand in state:
-                plural_score[cand] = 0
-            for cand1, cand2 in itertools.permutations(state, 2):
-                plural_score[cand1] += wmg[cand1][cand2]
-
-            # if current state satisfies one of the 3 goal state, continue to the next loop
-
-            # After using heuristics, generate children and push them into priority queue
-            # frontier = [val for val in known_winners if val in state] + list(set(state) - set(known_winners))
-
-            minscore = min(plural_score.values())
-            for to_be_deleted in state:
-                if plural_score[to_be_deleted] == minscore:
-                    child_state = state.copy()
-                    child_state.remove(to_be_deleted)
-                    tpc = tuple(sorted(child_state))
-                    if tpc in hashtable2:
-                        continue
-                    else:
-                        hashtable2.add(tpc)
-                        child_node = Node(value=child_state)
-                        stackNode.append(child_node)
-        return sorted(known_winners)
+        scorer = self.getScorer(profile)
+        return self.searchWinners(profile, scorer)
 
     def baldwintoc_winners(self, profile):
         """
@@ -866,149 +696,77 @@ class MechanismBaldwin():
 
         :ivar Profile profile: A Profile object that represents an election profile.
         """
-        ordering = profile.getOrderVectors()
-        m = profile.numCands
-        prefcounts = profile.getPreferenceCounts()
-
-        rankmaps = profile.getRankMaps()
-        if min(ordering[0]) == 0:
-            startstate = set(range(m))
-        else:
-            startstate = set(range(1, m + 1))
-        wmg = self.getWmg3(prefcounts, rankmaps, startstate, normalize=False)
-        known_winners = set()
-        # ----------Some statistics--------------
-        hashtable2 = set()
-
-        # push the node of start state into the priority queue
-        root = Node(value=startstate)
-        stackNode = []
-        stackNode.append(root)
-
-        while stackNode:
-            # ------------pop the current node-----------------
-            node = stackNode.pop()
-            # -------------------------------------------------
-            state = node.value.copy()
-
-            # goal state 1: if the state set contains only 1 candidate, then stop
-            if len(state) == 1 and list(state)[0] not in known_winners:
-                known_winners.add(list(state)[0])
-                continue
-            # goal state 2 (pruning): if the state set is subset of the known_winners set, then stop
-            if state <= known_winners:
-                continue
-            # ----------Compute plurality score for the current remaining candidates--------------
-            plural_score = dict()
-            for cand in state:
-                plural_score[cand] = 0
-            for cand1, cand2 in itertools.permutations(state, 2):
-                plural_score[cand1] += wmg[cand1][cand2]
-
-            # if current state satisfies one of the 3 goal state, continue to the next loop
-
-            # After using heuristics, generate children and push them into priority queue
-            # frontier = [val for val in known_winners if val in state] + list(set(state) - set(known_winners))
-            childbranch = 0
-            minscore = min(plural_score.values())
-            for to_be_deleted in state:
-                if plural_score[to_be_deleted] == minscore:
-                    child_state = state.copy()
-                    child_state.remove(to_be_deleted)
-                    tpc = tuple(sorted(child_state))
-                    if tpc in hashtable2:
-                        continue
-                    else:
-                        hashtable2.add(tpc)
-                        child_node = Node(value=child_state)
-                        stackNode.append(child_node)
-        return sorted(known_winners)
+        scorer = self.getScorer(profile)
+        return self.searchWinners(profile, scorer)
 
     def getWmg2(self, prefcounts, ordering, state, normalize=False):
         """
         Generate a weighted majority graph that represents the whole profile. The function will
         return a two-dimensional dictionary that associates integer representations of each pair of
-        candidates, cand1 and cand2, with the number of times cand1 is ranked above cand2 minus the
-        number of times cand2 is ranked above cand1.
+        candidates, cand1 and cand2, with the number of times cand1 is ranked above cand2.
 
+        :ivar list<int> prefcounts: The number of times each vote is given.
+        :ivar list<list<int>> ordering: The candidates of each vote, from most preferred to least.
+        :ivar set<int> state: The candidates of the graph.
         :ivar bool normalize: If normalize is True, the function will return a normalized graph
             where each edge has been divided by the value of the largest edge.
         """
 
-        # Initialize a new dictionary for our final weighted majority graph.
-        wmgMap = dict()
-        for cand in state:
-            wmgMap[cand] = dict()
-        for cand1, cand2 in itertools.combinations(state, 2):
-            wmgMap[cand1][cand2] = 0
-            wmgMap[cand2][cand1] = 0
-
-        # Go through the wmgMaps and increment the value of each edge in our final graph with the
-        # edges in each of the wmgMaps. We take into account the number of times that the vote
-        # occured.
+        candList = sorted(state)
+        candIndex = dict()
+        for j in range(0, len(candList)):
+            candIndex[candList[j]] = j
+        rankMatrix = np.zeros((len(prefcounts), len(candList)), dtype=rankmatrix.RANK_DTYPE)
         for i in range(0, len(prefcounts)):
-            for cand1, cand2 in itertools.combinations(ordering[i], 2):  # --------------------------
-                wmgMap[cand1][cand2] += prefcounts[i]
-
-        # By default, we assume that the weighted majority graph should not be normalized. If
-        # desired, we normalize by dividing each edge by the value of the largest edge.
-        if normalize == True:
-            maxEdge = float('-inf')
-            for cand in wmgMap.keys():
-                maxEdge = max(maxEdge, max(wmgMap[cand].values()))
-            for cand1 in wmgMap.keys():
-                for cand2 in wmgMap[cand1].keys():
-                    wmgMap[cand1][cand2] = float(wmgMap[cand1][cand2]) / maxEdge
-
-        return wmgMap
+            for position in range(0, len(ordering[i])):
+                rankMatrix[i, candIndex[ordering[i][position]]] = position + 1
+        pairwiseMatrix = rankmatrix.getPairwiseMatrix(rankMatrix, np.asarray(prefcounts))
+        return self.pairwiseMatrixToMap(pairwiseMatrix, candList, normalize)
 
     def getWmg3(self, prefcounts, rankmaps, state, normalize=False):
         """
         Generate a weighted majority graph that represents the whole profile. The function will
         return a two-dimensional dictionary that associates integer representations of each pair of
-        candidates, cand1 and cand2, with the number of times cand1 is ranked above cand2 minus the
-        number of times cand2 is ranked above cand1.
+        candidates, cand1 and cand2, with the number of times cand1 is ranked above cand2.
 
+        :ivar list<int> prefcounts: The number of times each vote is given.
+        :ivar list<dict<int,int>> rankmaps: Associates each candidate with its position in the
+            ranking, one dictionary per vote.
+        :ivar set<int> state: The candidates of the graph.
         :ivar bool normalize: If normalize is True, the function will return a normalized graph
             where each edge has been divided by the value of the largest edge.
         """
 
-        # Initialize a new dictionary for our final weighted majority graph.
-        wmgMap = dict()
-        for cand in state:
-            wmgMap[cand] = dict()
-        for cand1, cand2 in itertools.combinations(state, 2):
-            wmgMap[cand1][cand2] = 0
-            wmgMap[cand2][cand1] = 0
+        candList = sorted(state)
+        rankMatrix = rankmatrix.rankMapsToMatrix(rankmaps, candList)
+        pairwiseMatrix = rankmatrix.getPairwiseMatrix(rankMatrix, np.asarray(prefcounts))
+        return self.pairwiseMatrixToMap(pairwiseMatrix, candList, normalize)
+
+    def pairwiseMatrixToMap(self, pairwiseMatrix, candList, normalize=False):
+        """
+        Converts a pairwise matrix into the two-dimensional dictionary returned by getWmg2() and
+        getWmg3().
+
+        :ivar ndarray pairwiseMatrix: The (m, m) array whose entry [i, j] is the number of times
+            the i-th candidate of candList is ranked above the j-th.
+        :ivar list<int> candList: The integer representations of the candidates in column order.
+        :ivar bool normalize: If normalize is True, each edge is divided by the value of the
+            largest edge.
+        """
 
-        # Go through the wmgMaps and increment the value of each edge in our final graph with the
-        # edges in each of the wmgMaps. We take into account the number of times that the vote
-        # occured.
-        for i in range(0, len(prefcounts)):
-            # print("wmgMap=",wmgMap)
-            for cand1, cand2 in itertools.combinations(rankmaps[i].keys(), 2):  # --------------------------
-                # print("cand1=",cand1,"cand2=",cand2)
-                # print(rankmaps[0][cand1] , rankmaps[0][cand2])
-                if rankmaps[i][cand1] < rankmaps[i][cand2]:
-                    wmgMap[cand1][cand2] += prefcounts[i]
-                elif rankmaps[i][cand1] > rankmaps[i][cand2]:
-                    wmgMap[cand2][cand1] += prefcounts[i]
-                    # print("wmgMap=", wmgMap)
         # By default, we assume that the weighted majority graph should not be normalized. If
         # desired, we normalize by dividing each edge by the value of the largest edge.
         if normalize == True:
-            maxEdge = float('-inf')
-            for cand in wmgMap.keys():
-                maxEdge = max(maxEdge, max(wmgMap[cand].values()))
-            for cand1 in wmgMap.keys():
-                for cand2 in wmgMap[cand1].keys():
-                    wmgMap[cand1][cand2] = float(wmgMap[cand1][cand2]) / maxEdge
+            offDiagonal = ~np.eye(len(candList), dtype=bool)
+            pairwiseMatrix = pairwiseMatrix / pairwiseMatrix[offDiagonal].max()
+        return rankmatrix.wmgMatrixToMap(pairwiseMatrix, candList)
 
-        print("wmg=", wmgMap)
-        return wmgMap
 
+class MechanismCoombs(MechanismElimination):
+    """
+    The Coombs mechanism.
+    """
 
-class MechanismCoombs():
     def coombs_winners(self, profile):
         """
         Returns an integer list that represents all possible winners of a profile under Coombs rule.
@@ -1030,68 +788,8 @@ class MechanismCoombs():
 
         :ivar Profile profile: A Profile object that represents an election profile.
         """
-        ordering = profile.getOrderVectors()
-        m = profile.numCands
-        prefcounts = profile.getPreferenceCounts()
-        if min(ordering[0]) == 0:
-            startstate = set(range(m))
-        else:
-            startstate = set(range(1, m + 1))
-        known_winners = set()
-        # half = math.floor(n / 2.0)
-        # ----------Some statistics--------------
-        hashtable2 = set()
-
-        # push the node of start state into the priority queue
-        root = Node(value=startstate)
-        stackNode = []
-        stackNode.append(root)
-
-        while stackNode:
-            # ------------pop the current node----------------
-            node = stackNode.pop()
-            # -------------------------------------------------
-            state = node.value.copy()
-            # use heuristic to delete all the candidates which satisfy the following condition
-
-            # goal state 1: if the state set contains only 1 candidate, then stop
-            if len(state) == 1 and list(state)[0] not in known_winners:
-                known_winners.add(list(state)[0])
-                continue
-            # goal state 2 (pruning): if the state set is subset of the known_winners set, then stop
-            if state <= known_winners:
-                continue
-            # ----------Compute plurality score for the current remaining candidates-------------
-            reverse_veto_score = self.get_reverse_veto_scores(prefcounts, ordering, state, m)
-
-            # if current state satisfies one of the 3 goal state, continue to the next loop
-
-            # After using heuristics, generate children and push them into priority queue
-            # frontier = [val for val in known_winners if val in state] + list(set(state) - set(known_winners))
-
-            maxscore = max(reverse_veto_score.values())
-            for to_be_deleted in state:
-                if reverse_veto_score[to_be_deleted] == maxscore:
-                    child_state = state.copy()
-                    child_state.remove(to_be_deleted)
-                    tpc = tuple(sorted(child_state))
-                    if tpc in hashtable2:
-                        continue
-                    else:
-                        hashtable2.add(tpc)
-                        child_node = Node(value=child_state)
-                        stackNode.append(child_node)
-        return sorted(known_winners)
-
-    def get_reverse_veto_scores(self, prefcounts, ordering, state, m):
-        plural_score = {}
-        plural_score = plural_score.fromkeys(state, 0)
-        for i in range(len(prefcounts)):
-            for j in range(m - 1, -1, -1):
-                if ordering[i][j] in state:
-                    plural_score[ordering[i][j]] += prefcounts[i]
-                    break
-        return plural_score
+        scorer = elimination.VetoScorer(profile.getRankMatrix(), profile.getCountVector())
+        return self.searchWinners(profile, scorer)
 
     def coombstoc_winners(self, profile):
         """
@@ -1099,72 +797,8 @@ class MechanismCoombs():
 
         :ivar Profile profile: A Profile object that represents an election profile.
         """
-        ordering = profile.getOrderVectors()
-        m = profile.numCands
-        prefcounts = profile.getPreferenceCounts()
-        rankmaps = profile.getRankMaps()
-        if min(ordering[0]) == 0:
-            startstate = set(range(m))
-        else:
-            startstate = set(range(1, m + 1))
-        known_winners = set()
-        # half = math.floor(n / 2.0)
-        # ----------Some statistics--------------
-        hashtable2 = set()
-
-        # push the node of start state into the priority queue
-        root = Node(value=startstate)
-        stackNode = []
-        stackNode.append(root)
-
-        while stackNode:
-            # ------------pop the current node----------------
-            node = stackNode.pop()
-            # -------------------------------------------------
-            state = node.value.copy()
-            # use heuristic to delete all the candidates which satisfy the following condition
-
-            # goal state 1: if the state set contains only 1 candidate, then stop
-            if len(state) == 1 and list(state)[0] not in known_winners:
-                known_winners.add(list(state)[0])
-                continue
-            # goal state 2 (pruning): if the state set is subset of the known_winners set, then stop
-            if state <= known_winners:
-                continue
-            # ----------Compute plurality score for the current remaining candidates-------------
-            reverse_veto_score = self.get_reverse_veto_scores2(prefcounts, rankmaps, state)
-            # print("reverse_veto_score = ",reverse_veto_score)
-
-            # if current state satisfies one of the 3 goal state, continue to the next loop
-
-            # After using heuristics, generate children and push them into priority queue
-            # frontier = [val for val in known_winners if val in state] + list(set(state) - set(known_winners))
-
-            maxscore = max(reverse_veto_score.values())
-            for to_be_deleted in state:
-                if reverse_veto_score[to_be_deleted] == maxscore:
-                    child_state = state.copy()
-                    child_state.remove(to_be_deleted)
-                    tpc = tuple(sorted(child_state))
-                    if tpc in hashtable2:
-                        continue
-                    else:
-                        hashtable2.add(tpc)
-                        child_node = Node(value=child_state)
-                        stackNode.append(child_node)
-        return sorted(known_winners)
-
-    def get_reverse_veto_scores2(self, prefcounts, rankmaps, state):
-        plural_score = {}
-        plural_score = plural_score.fromkeys(state, 0)
-        for i in range(len(prefcounts)):
-            temp = list(filter(lambda x: x[0] in state, list(rankmaps[i].items())))
-            max_value = max([value for key, value in temp])
-            for j in state:
-                if rankmaps[i][j] == max_value:
-                    plural_score[j] += prefcounts[i]
-
-        return plural_score
+        scorer = elimination.VetoScorer(profile.getRankMatrix(), profile.getCountVector())
+        return self.searchWinners(profile, scorer)
 
 
 class MechanismRankedPairs():
@@ -1179,13 +813,23 @@ class MechanismRankedPairs():
     # = 1: outputs only initial state
     # = 2: outputs on stop conditions
     # = 3: outputs all data
-    def __init__(self):
+    def __init__(self, timeout=60 * 60 * 60, maxNodes=None, progress=None, progressInterval=1000):
         global debug_mode, BEGIN
         self.debug_mode = 0
         self.BEGIN = time.perf_counter()
 
-        # Timeout in seconds
-        self.TIMEOUT = 60 * 60 * 60
+        # Timeout in seconds, or None for no limit
+        self.TIMEOUT = timeout
+
+        # Number of nodes the search may explore, or None for no limit. When the time or the nodes
+        # run out, the winners found so far are returned and stats.complete is False.
+        self.MAX_NODES = maxNodes
+
+        # If given, called with the number of nodes explored, the size of the hashtable and the
+        # sorted list of the winners found so far, every progressInterval nodes of the outer search
+        # and once when the search ends
+        self.progress = progress
+        self.progressInterval = progressInterval
 
         self.tau_for_testing = 0.05
 
@@ -1209,6 +853,7 @@ class MechanismRankedPairs():
             self.num_redundant_edges = 0
             self.num_sampled = 0
             self.sampled = []
+            self.complete = True
 
     def output_graph(self, G):
         # Draws the given graph G using networkx
@@ -1301,6 +946,9 @@ class MechanismRankedPairs():
         # Initialize
         stats = self.Stats()
 
+        # The time budget is counted from the start of each search
+        self.BEGIN = time.perf_counter()
+
         wmg = profile.getWmg()
         known_winners = set()
         I = list(wmg.keys())
@@ -1336,6 +984,9 @@ class MechanismRankedPairs():
         hashtable = set()
 
         while stackNode:
+            if self.outOfBudget(stats):
+                break
+
             # Pop new node to explore
             node = stackNode.pop()
             (G, E) = node.value
@@ -1351,6 +1002,8 @@ class MechanismRankedPairs():
 
             stats.num_outer_nodes += 1
             stats.num_nodes += 1
+            if self.progress is not None and stats.num_outer_nodes % self.progressInterval == 0:
+                self.progress(stats.num_nodes, len(hashtable), sorted(known_winners))
 
             if self.debug_mode == 3:
                 print("Popped new node: ")
@@ -1444,8 +1097,21 @@ class MechanismRankedPairs():
                     print("E is empty")
                 self.add_winners(G, I, known_winners, stats)
 
+        if self.progress is not None:
+            self.progress(stats.num_nodes, len(hashtable), sorted(known_winners))
         return sorted(known_winners), stats
 
+    def outOfBudget(self, stats):
+        """
+        Returns True, and marks the search as incomplete, if the search has run out of time or
+        of nodes.
+        """
+        if self.TIMEOUT is not None and time.perf_counter() > self.BEGIN + self.TIMEOUT:
+            stats.complete = False
+        elif self.MAX_NODES is not None and stats.num_nodes >= self.MAX_NODES:
+            stats.complete = False
+        return not stats.complete
+
     def edges2string(self, edges, I):
         m = len(I)
         gstring = list(str(0).zfill(m**2))
@@ -1534,14 +1200,11 @@ class MechanismRankedPairs():
         root = Node(value=(self.edges2string(G.edges(), I), self.edges2string(tier, I), nodes_with_no_incoming))
         cstack.append(root)
 
-        END = self.BEGIN + self.TIMEOUT
-
         while cstack:
             node = cstack.pop()
             (G_str, T_str, no_incoming) = node.value
 
-            if time.perf_counter() > END:
-                print("TIMEOUT")
+            if self.outOfBudget(stats):
                 return max_children
 
             # Check hash. Doesn't ever happen if the below hash is included
@@ -1758,15 +1421,10 @@ class MechanismBlack():
             print("ERROR: unsupported election type")
             exit()
 
-        wmg = profile.getWmg()
-        m = profile.numCands
-        for cand1 in wmg.keys():
-            outgoing = 0
-            for cand2 in wmg[cand1].keys():
-                if wmg[cand1][cand2] > 0:
-                    outgoing += 1
-            if outgoing == m - 1:
-                return [cand1]
+        # The Condorcet winner wins if there is one.
+        condorcetWinner = pairwise.getCondorcetWinner(profile.getWmgMatrix())
+        if condorcetWinner is not None:
+            return [profile.getCandList()[condorcetWinner]]
 
         Borda_winner = MechanismBorda().getWinners(profile)
         return Borda_winner
@@ -2048,16 +1706,7 @@ class MechanismBordaMean():
         """
         n_candidates = profile.numCands
         prefcounts = profile.getPreferenceCounts()
-        len_prefcounts = len(prefcounts)
-        rankmaps = profile.getRankMaps()
-        values = zeros([len_prefcounts, n_candidates], dtype=int)
-        if min(list(rankmaps[0].keys())) == 0:
-            delta = 0
-        else:
-            delta = 1
-        for i in range(len_prefcounts):
-            for j in range(delta, n_candidates + delta):
-                values[i][j - delta] = rankmaps[i][j]
+        values = profile.getRankMatrix().astype(int)
         # print("values=", values)
         mat0 = self._build_mat(values, n_candidates, prefcounts)
         borda = [0 for i in range(n_candidates)]
@@ -2099,17 +1748,7 @@ class MechanismBordaMean():
     def simulated_approval(self, profile):
         n_candidates = profile.numCands
         n_voters = profile.numVoters
-        prefcounts = profile.getPreferenceCounts()
-        len_prefcounts = len(prefcounts)
-        rankmaps = profile.getRankMaps()
-        values = zeros([len_prefcounts, n_candidates], dtype=int)
-        if min(list(rankmaps[0].keys())) == 0:
-            delta = 0
-        else:
-            delta = 1
-        for i in range(len_prefcounts):
-            for j in range(delta, n_candidates + delta):
-                values[i][j - delta] = rankmaps[i][j]
+        values = profile.getRankMatrix().astype(int)
         approval = list()
         for i in range(n_voters):
             vote = array([list(values[i, :])])
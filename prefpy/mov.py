@@ -3,6 +3,7 @@ Authors: Kevin J. Hwang
         Jun Wang
 """
 import prefpy_io
+import pairwise
 import math
 import itertools
 import copy
@@ -38,22 +39,20 @@ def MoVScoring(profile, scoringVector):
         exit()
 
     # Construct the score matrix--values
-    prefcounts = array(profile.getPreferenceCounts())
-    rankmaps = profile.getRankMaps()
+    prefcounts = profile.getCountVector()
     len_prefcounts = len(prefcounts)
-    values = zeros([len_prefcounts, m], dtype=int)
+    # Unranked candidates, at position 0 of the rank matrix, get no score.
+    rankMatrix = profile.getRankMatrix()
+    values = where(rankMatrix > 0, array(scoringVector)[rankMatrix - 1], 0).astype(int)
 
-    if min(list(rankmaps[0].keys())) == 0:
+    if min(profile.candMap.keys()) == 0:
         delta = 0
     else:
         delta = 1
 
-    for i in range(len_prefcounts):
-        for j in range(delta, m + delta):
-            values[i][j - delta] = scoringVector[rankmaps[i][j] - 1]
-
-    # Compute the scores of all the candidates
-    score = dot(array(prefcounts), values)
+    # Compute the scores of all the candidates from the number of times each is ranked at each
+    # position.
+    score = dot(profile.getPositionMatrix(), array(scoringVector).astype(int))
     # Compute the winner of the original profile
 
     d = argmax(score, axis=0) + delta
@@ -117,16 +116,15 @@ def MoVSimplifiedBucklin(profile):
     m = profile.numCands
     half = math.floor(float(n) / 2)
     prefcounts = profile.getPreferenceCounts()
-    len_prefcounts = len(prefcounts)
-    rankmaps = profile.getRankMaps()
-    values = zeros([len_prefcounts, m], dtype=int)
-    if min(list(rankmaps[0].keys())) == 0:
+    values = profile.getRankMatrix().astype(int)
+    if min(profile.candMap.keys()) == 0:
         delta = 0
     else:
         delta = 1
-    for i in range(len_prefcounts):
-        for j in range(delta, m + delta):
-            values[i][j - delta] = rankmaps[i][j]
+
+    # atMost[c, ell] is the number of voters who rank candidate c in the first ell positions.
+    positionMatrix = profile.getPositionMatrix()
+    atMost = hstack((zeros((m, 1), dtype=positionMatrix.dtype), cumsum(positionMatrix, axis=1)))
 
     winners = MechanismSimplifiedBucklin().getWinners(profile)  # the winner list
     d = winners[0]  # the winner under the numerically tie-breaking rule
@@ -138,8 +136,8 @@ def MoVSimplifiedBucklin(profile):
             numcond1 = sum(dot(array(prefcounts), logical_and(values[:, c - delta] > ell, values[:, d - delta] <= ell - 1)))
             numcond2 = sum(dot(array(prefcounts), logical_and(values[:, c - delta] > ell, values[:, d - delta] > ell - 1)))
             numcond3 = sum(dot(array(prefcounts), logical_and(values[:, c - delta] <= ell, values[:, d - delta] <= ell - 1)))
-            diff_c = half - sum(dot(array(prefcounts), (values[:, c - delta] <= ell)))
-            diff_d = half - sum(dot(array(prefcounts), (values[:, d - delta] <= ell - 1)))
+            diff_c = half - atMost[c - delta, min(ell, m)]
+            diff_d = half - atMost[d - delta, min(ell - 1, m)]
             if diff_c < 0:
                 if diff_d < 0 and numcond1 + numcond3 > abs(diff_d):
                     MoV[c - delta] = min(MoV[c - delta], abs(diff_d))
@@ -322,19 +320,9 @@ def AppMoVMaximin(profile):
     m = profile.numCands
 
     # Compute the original winner d
-    wmgMap = profile.getWmg()
-    # Initialize each Copeland score as infinity.
-    maximinscores = {}
-    for cand in wmgMap.keys():
-        maximinscores[cand] = float("inf")
-
-    # For each pair of candidates, calculate the number of votes in which one beat the other.
-
-    # For each pair of candidates, calculate the number of times each beats the other.
-    for cand1, cand2 in itertools.combinations(wmgMap.keys(), 2):
-        if cand2 in wmgMap[cand1].keys():
-            maximinscores[cand1] = min(maximinscores[cand1], wmgMap[cand1][cand2])
-            maximinscores[cand2] = min(maximinscores[cand2], wmgMap[cand2][cand1])
+    # The maximin score of each candidate is its smallest margin against another candidate.
+    maximinscores = pairwise.scoresToMap(pairwise.getMaximinScores(profile.getWmgMatrix()),
+                                         profile.getCandList(), profile.candMap.keys())
     d = max(maximinscores.items(), key=lambda x: x[1])[0]
 
     #Compute c* = argmax_c maximinscores(c)
@@ -380,19 +368,9 @@ def getMaximinScores(profile):
         print("ERROR: unsupported election type")
         exit()
 
-    wmgMap = profile.getWmg()
-    # Initialize each Copeland score as infinity.
-    maximinscores = {}
-    for cand in wmgMap.keys():
-        maximinscores[cand] = float("inf")
-
-    # For each pair of candidates, calculate the number of votes in which one beat the other.
-
-    # For each pair of candidates, calculate the number of times each beats the other.
-    for cand1, cand2 in itertools.combinations(wmgMap.keys(), 2):
-        if cand2 in wmgMap[cand1].keys():
-            maximinscores[cand1] = min(maximinscores[cand1], wmgMap[cand1][cand2])
-            maximinscores[cand2] = min(maximinscores[cand2], wmgMap[cand2][cand1])
+    # The maximin score of each candidate is its smallest margin against another candidate.
+    maximinscores = pairwise.scoresToMap(pairwise.getMaximinScores(profile.getWmgMatrix()),
+                                         profile.getCandList(), profile.candMap.keys())
 
     return maximinscores
 
@@ -416,25 +394,11 @@ def AppMoVCopeland(profile, alpha=0.5):
     m = profile.numCands
 
     # Compute the original winner d
-    # Initialize each Copeland score as 0.0.
-    copelandscores = {}
-    for cand in profile.candMap.keys():
-        copelandscores[cand] = 0.0
-
-    # For each pair of candidates, calculate the number of votes in which one beat the other.
-    wmgMap = profile.getWmg()
-    for cand1, cand2 in itertools.combinations(wmgMap.keys(), 2):
-        if cand2 in wmgMap[cand1].keys():
-            if wmgMap[cand1][cand2] > 0:
-                copelandscores[cand1] += 1.0
-            elif wmgMap[cand1][cand2] < 0:
-                copelandscores[cand2] += 1.0
-
-            # If a pair of candidates is tied, we add alpha to their score for each vote.
-            else:
-                copelandscores[cand1] += alpha
-                copelandscores[cand2] += alpha
+    # Each candidate scores 1 for each pairwise election it wins and alpha for each tie.
+    copelandscores = pairwise.scoresToMap(pairwise.getCopelandScores(profile.getWmgMatrix(), alpha),
+                                          profile.getCandList(), profile.candMap.keys())
     d = max(copelandscores.items(), key=lambda x: x[1])[0]
+    wmgMap = profile.getWmg()
 
     #Compute c* = argmin_c RM(d,c)
     relative_margin = {}
@@ -450,23 +414,10 @@ def RM(wmgMap, n, m, d, c, alpha=0.5):
 
     alter_without_d = delete(range(1, m + 1), d - 1)
     alter_without_c = delete(range(1, m + 1), c - 1)
-    for t in range(n):
-        # Compute s_-t_d and s_t_c
-        s_neg_t_d = 0
-        s_t_c = 0
-        for e in alter_without_d:
-            if wmgMap[e][d] < -2 * t:
-                s_neg_t_d += 1.0
-            elif wmgMap[e][d] == -2 * t:
-                s_neg_t_d += alpha
-        for e in alter_without_c:
-            if wmgMap[e][c] < 2 * t:
-                s_t_c += 1.0
-            elif wmgMap[e][c] == 2 * t:
-                s_t_c += alpha
-
-        if s_neg_t_d <= s_t_c:
-            return t
+    margins_d = array([wmgMap[e][d] for e in alter_without_d])
+    margins_c = array([wmgMap[e][c] for e in alter_without_c])
+    # The smallest t such that s_-t_d <= s_t_c.
+    return pairwise.getRelativeMargin(margins_d, margins_c, n, alpha)
 
 
 def CopelandWinner(profile, alpha=0.5):
@@ -503,24 +454,9 @@ def getCopelandScores(profile, alpha=0.5, normalize=False):
         print("ERROR: unsupported election type")
         exit()
 
-    # Initialize each Copeland score as 0.0.
-    copelandscores = {}
-    for cand in profile.candMap.keys():
-        copelandscores[cand] = 0.0
-
-    # For each pair of candidates, calculate the number of votes in which one beat the other.
-    wmgMap = profile.getWmg()
-    for cand1, cand2 in itertools.combinations(wmgMap.keys(), 2):
-        if cand2 in wmgMap[cand1].keys():
-            if wmgMap[cand1][cand2] > 0:
-                copelandscores[cand1] += 1.0
-            elif wmgMap[cand1][cand2] < 0:
-                copelandscores[cand2] += 1.0
-
-            # If a pair of candidates is tied, we add alpha to their score for each vote.
-            else:
-                copelandscores[cand1] += alpha
-                copelandscores[cand2] += alpha
+    # Each candidate scores 1 for each pairwise election it wins and alpha for each tie.
+    copelandscores = pairwise.scoresToMap(pairwise.getCopelandScores(profile.getWmgMatrix(), alpha),
+                                          profile.getCandList(), profile.candMap.keys())
 
     if normalize:
         m = profile.numCands
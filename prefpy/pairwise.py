@@ -0,0 +1,128 @@
+"""
+Array kernels over the weighted majority graph of a Profile.
+
+The weighted majority graph is an (m, m) integer array, as returned by Profile.getWmgMatrix(), whose
+entry [i, j] is the number of voters who rank the i-th candidate of Profile.getCandList() above the
+j-th candidate minus the number of voters who rank the j-th candidate above the i-th. Its diagonal
+is 0. The score kernels also accept a (K, m, m) stack of graphs and then return one row of scores
+per graph.
+"""
+import numpy as np
+
+
+def getCopelandScores(wmg, alpha = 0.5):
+    """
+    Returns a float array with the Copeland score of each candidate, that is, the number of other
+    candidates it beats in a pairwise election plus alpha times the number it ties with.
+
+    :ivar ndarray wmg: The (m, m) weighted majority graph.
+    :ivar float alpha: The score given to each candidate of a tied pair.
+    """
+
+    offDiagonal = ~np.eye(wmg.shape[-1], dtype=bool)
+    wins = np.count_nonzero(wmg > 0, axis=-1)
+    ties = np.count_nonzero((wmg == 0) & offDiagonal, axis=-1)
+    return wins + alpha * ties
+
+
+def getMaximinScores(wmg):
+    """
+    Returns an array with the maximin score of each candidate, that is, its smallest margin against
+    any other candidate. With fewer than two candidates the scores are infinite.
+
+    :ivar ndarray wmg: The (m, m) weighted majority graph.
+    """
+
+    numCands = wmg.shape[-1]
+    if numCands < 2:
+        return np.full(wmg.shape[:-1], np.inf)
+    wmg = np.asarray(wmg, dtype=np.int64)
+    offDiagonal = np.where(np.eye(numCands, dtype=bool), np.iinfo(np.int64).max, wmg)
+    return offDiagonal.min(axis=-1)
+
+
+def getCondorcetWinner(wmg):
+    """
+    Returns the index of the candidate who beats every other candidate in a pairwise election, or
+    None if there is no such candidate.
+
+    :ivar ndarray wmg: The (m, m) weighted majority graph.
+    """
+
+    winners = np.flatnonzero(np.count_nonzero(wmg > 0, axis=1) == len(wmg) - 1)
+    if len(winners) == 0:
+        return None
+    return int(winners[0])
+
+
+def getRelativeMarginScore(margins, threshold, alpha = 0.5):
+    """
+    Returns the number of margins below the threshold plus alpha times the number of margins equal
+    to it. This is the Copeland score s_t used by the relative margin of mov.RM(), given the
+    margins of the other candidates against one candidate.
+
+    :ivar ndarray margins: The entries of one column of the weighted majority graph, without the
+        diagonal.
+    :ivar int threshold: The threshold the margins are compared with.
+    :ivar float alpha: The score given to each margin equal to the threshold.
+    """
+
+    return np.count_nonzero(margins < threshold) + alpha * np.count_nonzero(margins == threshold)
+
+
+def getRelativeMargin(marginsD, marginsC, n, alpha = 0.5):
+    """
+    Returns the relative margin of mov.RM(), the smallest t in [0, n) such that
+    getRelativeMarginScore(marginsD, -2t) <= getRelativeMarginScore(marginsC, 2t), or None if
+    there is no such t.
+
+    Both scores only change when 2t reaches a margin, so the smallest t is either 0 or a value at
+    which one of the counts changes. Only those values are evaluated, by binary search over the
+    sorted margins.
+
+    :ivar ndarray marginsD: The margins of the other candidates against the winner d.
+    :ivar ndarray marginsC: The margins of the other candidates against the candidate c.
+    :ivar int n: The number of voters.
+    :ivar float alpha: The score given to each margin equal to the threshold.
+    """
+
+    marginsD = np.sort(np.asarray(marginsD, dtype=np.int64))
+    marginsC = np.sort(np.asarray(marginsC, dtype=np.int64))
+
+    # A count changes between t - 1 and t when -2t <= x <= -2t + 2 for a margin x of d, or when
+    # 2t - 2 <= y <= 2t for a margin y of c.
+    firstD = -np.floor_divide(marginsD, 2)
+    firstC = -np.floor_divide(-marginsC, 2)
+    candidates = np.concatenate(([0], firstD, firstD + 1, firstC, firstC + 1))
+    candidates = np.unique(candidates[(candidates >= 0) & (candidates < n)])
+    if len(candidates) == 0:
+        return None
+
+    thresholdsD = -2 * candidates
+    belowD = np.searchsorted(marginsD, thresholdsD, side="left")
+    equalD = np.searchsorted(marginsD, thresholdsD, side="right") - belowD
+    thresholdsC = 2 * candidates
+    belowC = np.searchsorted(marginsC, thresholdsC, side="left")
+    equalC = np.searchsorted(marginsC, thresholdsC, side="right") - belowC
+
+    satisfied = np.flatnonzero(belowD + alpha * equalD <= belowC + alpha * equalC)
+    if len(satisfied) == 0:
+        return None
+    return int(candidates[satisfied[0]])
+
+
+def scoresToMap(scores, candList, cands = None):
+    """
+    Returns a dictionary that associates the integer representation of each candidate with its
+    entry of an array of scores ordered as candList.
+
+    :ivar ndarray scores: The score of each candidate.
+    :ivar list<int> candList: The integer representations of the candidates in the order of scores.
+    :ivar list<int> cands: The candidates in the order the dictionary should list them. Defaults to
+        candList.
+    """
+
+    candScores = dict(zip(candList, np.asarray(scores).tolist()))
+    if cands is None:
+        return candScores
+    return dict((cand, candScores[cand]) for cand in cands)
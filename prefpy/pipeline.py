@@ -0,0 +1,311 @@
+"""
+Evaluates several voting rules on one Profile while computing each derived statistic only once.
+
+Each statistic is read through the Profile's cached getters, so once it has been computed every
+mechanism that asks the Profile for it gets the shared copy. The statistics are computed in the
+order of their dependencies before the rules run, which also lets each stage be timed separately.
+
+Many profiles can be evaluated by a pool of processes with evaluateMany(), or, when they have the
+same number of candidates, all at once with evaluateStacked().
+"""
+import collections
+import concurrent.futures
+import contextlib
+import io
+import os
+import time
+import numpy as np
+import mechanism
+import pairwise
+import rankmatrix
+from .profile import Profile
+
+# Associates the name of each statistic with the names of the statistics it is derived from and
+# with a function that computes it from a Profile.
+STATS = {
+    "elecType": ([], lambda profile: profile.getElecType()),
+    "preferenceCounts": ([], lambda profile: profile.getPreferenceCounts()),
+    "rankMatrix": ([], lambda profile: profile.getRankMatrix()),
+    "countVector": ([], lambda profile: profile.getCountVector()),
+    "rankMaps": ([], lambda profile: profile.getRankMaps()),
+    "positionMatrix": (["rankMatrix", "countVector"], lambda profile: profile.getPositionMatrix()),
+    "pairwiseMatrix": (["rankMatrix", "countVector"], lambda profile: profile.getPairwiseMatrix()),
+    # When every vote ranks every candidate this is the matrix of "pairwiseMatrix".
+    "pairwiseMatrixUnrankedLast": (["elecType", "pairwiseMatrix"],
+        lambda profile: profile.getPairwiseMatrix(unrankedLast=True)),
+    "wmg": (["pairwiseMatrix"], lambda profile: profile.getWmgMatrix()),
+    "wmgMap": (["wmg"], lambda profile: profile.getWmg()),
+}
+
+# Associates the name of each rule with the statistics it uses and with a function that returns
+# its list of winners for a Profile.
+RULES = {
+    "plurality": (["elecType", "positionMatrix"],
+        lambda profile: mechanism.MechanismPlurality().getWinners(profile)),
+    "borda": (["elecType", "positionMatrix"],
+        lambda profile: mechanism.MechanismBorda().getWinners(profile)),
+    "veto": (["elecType", "positionMatrix"],
+        lambda profile: mechanism.MechanismVeto().getWinners(profile)),
+    "simplifiedBucklin": (["elecType", "positionMatrix"],
+        lambda profile: mechanism.MechanismSimplifiedBucklin().getWinners(profile)),
+    "pluralityRunOff": (["elecType", "positionMatrix", "rankMaps", "preferenceCounts"],
+        lambda profile: mechanism.MechanismPluralityRunOff().PluRunOff_cowinners(profile)),
+    "copeland": (["elecType", "wmg"],
+        lambda profile: mechanism.MechanismCopeland(0.5).getWinners(profile)),
+    "maximin": (["elecType", "wmg"],
+        lambda profile: mechanism.MechanismMaximin().getWinners(profile)),
+    "black": (["elecType", "wmg", "positionMatrix"],
+        lambda profile: mechanism.MechanismBlack().black_winner(profile)),
+    "schulze": (["pairwiseMatrixUnrankedLast"],
+        lambda profile: mechanism.MechanismSchulze().getWinners(profile)),
+    "stv": (["elecType", "rankMatrix", "countVector"],
+        lambda profile: mechanism.MechanismSTV().STVwinners(profile)),
+    "baldwin": (["elecType", "pairwiseMatrix"],
+        lambda profile: mechanism.MechanismBaldwin().baldwin_winners(profile)),
+    "coombs": (["elecType", "rankMatrix", "countVector"],
+        lambda profile: mechanism.MechanismCoombs().coombs_winners(profile)),
+    "rankedPairs": (["wmgMap"],
+        lambda profile: mechanism.MechanismRankedPairs().getWinners(profile)[0]),
+}
+
+
+def registerRule(name, stats, getWinners):
+    """
+    Adds a rule that evaluate() can run, or replaces the rule with the same name.
+
+    :ivar str name: The name of the rule.
+    :ivar list<str> stats: The names of the statistics of STATS that the rule uses.
+    :ivar function getWinners: A function that takes a Profile and returns its list of winners.
+    """
+
+    for stat in stats:
+        if stat not in STATS:
+            raise ValueError("unknown statistic %s" % stat)
+    RULES[name] = (stats, getWinners)
+
+
+def getStatOrder(stats):
+    """
+    Returns the given statistics together with all the statistics they depend on, each listed
+    after its dependencies.
+
+    :ivar list<str> stats: The names of the statistics needed.
+    """
+
+    order = []
+    visited = set()
+
+    def visit(stat):
+        if stat in visited:
+            return
+        if stat not in STATS:
+            raise ValueError("unknown statistic %s" % stat)
+        visited.add(stat)
+        for dependency in STATS[stat][0]:
+            visit(dependency)
+        order.append(stat)
+
+    for stat in stats:
+        visit(stat)
+    return order
+
+
+def evaluate(profile, rules = None):
+    """
+    Returns a dictionary that associates the name of each rule with its list of winners for the
+    profile, and a dictionary that associates the name of each statistic and each rule with the
+    number of seconds it took to compute.
+
+    :ivar Profile profile: A Profile object that represents an election profile.
+    :ivar list<str> rules: The names of the rules of RULES to evaluate. Defaults to all of them.
+    """
+
+    if rules is None:
+        rules = list(RULES.keys())
+    for rule in rules:
+        if rule not in RULES:
+            raise ValueError("unknown rule %s" % rule)
+
+    stats = []
+    for rule in rules:
+        stats.extend(RULES[rule][0])
+
+    timings = dict()
+    for stat in getStatOrder(stats):
+        start = time.perf_counter()
+        STATS[stat][1](profile)
+        timings[stat] = time.perf_counter() - start
+
+    winners = dict()
+    for rule in rules:
+        start = time.perf_counter()
+        winners[rule] = RULES[rule][1](profile)
+        timings[rule] = time.perf_counter() - start
+
+    return winners, timings
+
+
+def evaluateSafely(profile, rules = None):
+    """
+    Returns the winners of evaluate() and None, or None and an error message if the evaluation
+    failed. The mechanisms report unsupported profiles by printing a message and exiting, so the
+    output is captured and the printed message becomes the error message.
+
+    :ivar Profile profile: A Profile object that represents an election profile, or a tuple of a
+        candMap, a rank matrix and a count vector as taken by Profile.importRankMatrix().
+    :ivar list<str> rules: The names of the rules of RULES to evaluate. Defaults to all of them.
+    """
+
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            if isinstance(profile, tuple):
+                candMap, rankMatrix, counts = profile
+                profile = Profile(candMap, [])
+                profile.importRankMatrix(rankMatrix, counts)
+            winners = evaluate(profile, rules)[0]
+        return winners, None
+    except SystemExit:
+        message = output.getvalue().strip()
+        if message == "":
+            message = "exit() called"
+        return None, message
+    except Exception as e:
+        return None, "%s: %s" % (type(e).__name__, e)
+
+
+def evaluateChunk(profiles, rules):
+    """
+    Returns the results of evaluateSafely() for a list of profiles. This is the task run by each
+    worker of evaluateMany().
+    """
+
+    return [evaluateSafely(profile, rules) for profile in profiles]
+
+
+def evaluateMany(profiles, rules = None, maxWorkers = None, chunkSize = 16, maxPendingChunks = None):
+    """
+    Evaluates the rules on each profile of an iterable with a pool of processes and generates
+    the results of evaluateSafely(), a pair of the winners and an error message, in the order of
+    the profiles. A profile that fails does not stop the others.
+
+    The profiles are sent to the workers chunkSize at a time, and at most maxPendingChunks chunks
+    are in flight, so the iterable is consumed only as fast as the results are.
+
+    :ivar iterable profiles: Profile objects, or tuples of a candMap, a rank matrix and a count
+        vector as taken by Profile.importRankMatrix().
+    :ivar list<str> rules: The names of the rules of RULES to evaluate. Defaults to all of them.
+    :ivar int maxWorkers: The number of worker processes. Defaults to the number of processors.
+    :ivar int chunkSize: The number of profiles sent to a worker at a time.
+    :ivar int maxPendingChunks: The number of chunks in flight. Defaults to twice the number of
+        workers.
+    """
+
+    if rules is not None:
+        for rule in rules:
+            if rule not in RULES:
+                raise ValueError("unknown rule %s" % rule)
+
+    if maxWorkers is None:
+        maxWorkers = os.cpu_count() or 1
+    if maxPendingChunks is None:
+        maxPendingChunks = 2 * maxWorkers
+    executor = concurrent.futures.ProcessPoolExecutor(maxWorkers)
+    pending = collections.deque()
+    try:
+        chunk = []
+        for profile in profiles:
+            chunk.append(profile)
+            if len(chunk) < chunkSize:
+                continue
+            pending.append(executor.submit(evaluateChunk, chunk, rules))
+            chunk = []
+            while len(pending) >= maxPendingChunks:
+                for result in pending.popleft().result():
+                    yield result
+        if len(chunk) > 0:
+            pending.append(executor.submit(evaluateChunk, chunk, rules))
+        while pending:
+            for result in pending.popleft().result():
+                yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown()
+
+
+# The rules that evaluateStacked() computes for many profiles at once.
+STACKED_RULES = ["plurality", "borda", "veto", "kApproval", "copeland", "maximin"]
+
+
+def evaluateStacked(profiles, rules = None, k = 2, blockSize = 1024):
+    """
+    Evaluates the rules on many profiles with the same number of candidates at once. Returns a
+    dictionary that associates the name of each rule with a (K, m) array of the candidates' scores
+    in each profile, ordered as in Profile.getCandList(), and a dictionary that associates the
+    name of each rule with the list of the winners of each profile. The scores and the winners
+    are those of the corresponding mechanisms.
+
+    The profiles are packed blockSize at a time into a padded rank tensor, see
+    rankmatrix.stackRankMatrices(), and every rule is computed for the whole block by a few array
+    operations.
+
+    :ivar list<Profile> profiles: Profiles of complete orderings over the same number of
+        candidates.
+    :ivar list<str> rules: The names of the rules of STACKED_RULES to evaluate. Defaults to all
+        of them.
+    :ivar int k: The number of positions that score under kApproval.
+    :ivar int blockSize: The number of profiles packed together.
+    """
+
+    if rules is None:
+        rules = STACKED_RULES
+    for rule in rules:
+        if rule not in STACKED_RULES:
+            raise ValueError("unsupported stacked rule %s" % rule)
+    for profile in profiles:
+        elecType = profile.getElecType()
+        if elecType != "soc" and elecType != "toc":
+            raise ValueError("unsupported election type %s" % elecType)
+
+    scores = dict((rule, []) for rule in rules)
+    for start in range(0, len(profiles), blockSize):
+        block = profiles[start:start + blockSize]
+        rankTensor, countMatrix = rankmatrix.stackRankMatrices(
+            [profile.getRankMatrix() for profile in block],
+            [profile.getCountVector() for profile in block])
+        numCands = rankTensor.shape[2]
+
+        if "plurality" in rules or "borda" in rules or "kApproval" in rules:
+            positionMatrices = rankmatrix.getStackedPositionMatrices(rankTensor, countMatrix)
+            positionMatrices = positionMatrices.astype(float)
+        if "plurality" in rules:
+            scores["plurality"].append(positionMatrices[:, :, 0])
+        if "borda" in rules:
+            scoringVector = np.arange(numCands - 1, -1, -1, dtype=float)
+            scores["borda"].append(np.dot(positionMatrices, scoringVector))
+        if "kApproval" in rules:
+            scoringVector = (np.arange(numCands) < k).astype(float)
+            scores["kApproval"].append(np.dot(positionMatrices, scoringVector))
+        if "veto" in rules:
+            # The last position of a vote may be shared by several candidates.
+            notLast = rankTensor < rankTensor.max(axis=2, keepdims=True)
+            scores["veto"].append(np.einsum("kn,knc->kc", countMatrix.astype(float),
+                notLast.astype(float)))
+
+        if "copeland" in rules or "maximin" in rules:
+            wmgMatrices = rankmatrix.getStackedWmgMatrices(rankTensor, countMatrix)
+        if "copeland" in rules:
+            scores["copeland"].append(pairwise.getCopelandScores(wmgMatrices, 0.5))
+        if "maximin" in rules:
+            scores["maximin"].append(pairwise.getMaximinScores(wmgMatrices))
+
+    winners = dict()
+    for rule in rules:
+        scores[rule] = np.concatenate(scores[rule])
+        isBest = scores[rule] == scores[rule].max(axis=1, keepdims=True)
+        winners[rule] = []
+        for j in range(0, len(profiles)):
+            candList = profiles[j].getCandList()
+            winners[rule].append([candList[i] for i in np.flatnonzero(isBest[j])])
+    return scores, winners
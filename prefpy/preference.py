@@ -12,12 +12,26 @@ class Preference():
         ranked above cand2 minus the number of times cand2 is ranked above cand1. This dictionary
         represents a weighted majority graph.
     :ivar int count: the number of voters holding this preference.
+
+    The ranking implied by the weighted majority graph is computed once, the first time one of the
+    rank views is requested, and is recomputed only if wmgMap is assigned a new dictionary.
     """
 
+    __slots__ = ("_wmgMap", "count", "_tiers")
+
     def __init__(self, wmgMap, count = 1):
         self.wmgMap = wmgMap
         self.count = count
 
+    @property
+    def wmgMap(self):
+        return self._wmgMap
+
+    @wmgMap.setter
+    def wmgMap(self, wmgMap):
+        self._wmgMap = wmgMap
+        self._tiers = None
+
     def isFullPreferenceOrder(self, candList):
         """
         Returns True if the underlying weighted majority graph contains a comparision between every
@@ -73,23 +87,32 @@ class Preference():
 
         return incEdgesMap
 
+    def getTiers(self):
+        """
+        Returns a tuple of tiers ordered from most preferred to least. Each tier is a tuple of the
+        integer representations of the candidates that are ranked at the same position. The tiers
+        are computed from getIncEdgesMap() on the first call and stored.
+        """
+
+        # We sort the candidates based on the number of incoming edges they have in the graph. If 
+        # two candidates have the same number, we assume that they are tied.
+        if self._tiers is None:
+            incEdgesMap = self.getIncEdgesMap()
+            sortedKeys = sorted(incEdgesMap.keys(), reverse = True)
+            self._tiers = tuple(tuple(incEdgesMap[key]) for key in sortedKeys)
+        return self._tiers
+
     def getRankMap(self):
         """
         Returns a dictionary that associates the integer representation of each candidate with its
         position in the ranking, starting from 1.
         """
 
-        # We sort the candidates based on the number of incoming edges they have in the graph. If 
-        # two candidates have the same number, we assume that they are tied.
-        incEdgesMap = self.getIncEdgesMap()
-        sortedKeys = sorted(incEdgesMap.keys(), reverse = True)
+        tiers = self.getTiers()
         rankMap = dict()
-        pos = 1
-        for key in sortedKeys:
-            cands = incEdgesMap[key]
-            for cand in cands:
-                rankMap[cand] = pos
-            pos += 1
+        for pos in range(0, len(tiers)):
+            for cand in tiers[pos]:
+                rankMap[cand] = pos + 1
         return rankMap
 
     def getReverseRankMap(self):
@@ -97,67 +120,33 @@ class Preference():
         Returns a dictionary that associates each position in the ranking with a list of integer 
         representations of the candidates ranked at that position.
         """
-        
-        # We sort the candidates based on the number of incoming edges they have in the graph. If 
-        # two candidates have the same number, we assume that they are tied.
-        incEdgesMap = self.getIncEdgesMap()
-        sortedKeys = sorted(incEdgesMap.keys(), reverse = True)
+
+        tiers = self.getTiers()
         reverseRankMap = dict()
-        pos = 1
-        for key in sortedKeys:
-            cands = incEdgesMap[key]
-            reverseRankMap[pos] = cands
-            pos += 1
+        for pos in range(0, len(tiers)):
+            reverseRankMap[pos + 1] = list(tiers[pos])
         return reverseRankMap
 
     def getOrderVector(self):
         """
-        Returns a list of lists. Each list represents tiers of candidates. candidates in earlier
-        tiers are preferred to candidates appearing in later tiers. Candidates in the same tier
-        are preferred equally. 
+        Returns a list of candidates ordered from most preferred to least. Only the first candidate
+        of each tier is listed, so tied candidates after the first are left out.
         """
 
-        # We sort the candidates based on the number of incoming edges they have in the graph. If 
-        # two candidates have the same number, we assume that they are tied.
-        incEdgesMap = self.getIncEdgesMap()
-        sortedKeys = sorted(incEdgesMap.keys(), reverse = True)
         orderVector = []
-        print(sortedKeys)
-        # print("sortedKeys",sortedKeys)
-        # print("incEdgesMap", incEdgesMap)
-        for key in sortedKeys:
-            tier = []
-            cands = incEdgesMap[key]
-            # print("qq",cands)
-            for cand in cands:
-                tier.append(cand)
-                # print("cand=",cand)
-            # print("tier", tier)
-            orderVector.append(tier[0])  # replace tier with tier[0]
+        for tier in self.getTiers():
+            orderVector.append(tier[0])
         return orderVector
 
     def getOrderVectorEGMM(self):
         """
-        Returns a list of lists. Each list represents tiers of candidates. candidates in earlier
-        tiers are preferred to candidates appearing in later tiers. Candidates in the same tier
-        are preferred equally. 
+        Returns a list that associates each integer representation of a candidate, used as an index,
+        with the number of tiers ranked above the candidate.
         """
 
-        # We sort the candidates based on the number of incoming edges they have in the graph. If 
-        # two candidates have the same number, we assume that they are tied.
-        incEdgesMap = self.getIncEdgesMap()
-        sortedKeys = sorted(incEdgesMap.keys())
-        orderVector = []
-        # print("sortedKeys",sortedKeys)
-        # print("incEdgesMap", incEdgesMap)
-        m = 0
-        for key in sortedKeys:
-            m += len(incEdgesMap[key])
-        result = [0] * m
-        for k in range(0, len(sortedKeys)):
-            key = sortedKeys[k]
-            cands = incEdgesMap[key]
-            # print("qq",cands)
-            for cand in cands:
-                result[cand] = len(sortedKeys) - (k + 1)
-        return result
\ No newline at end of file
+        tiers = self.getTiers()
+        result = [0] * sum(len(tier) for tier in tiers)
+        for pos in range(0, len(tiers)):
+            for cand in tiers[pos]:
+                result[cand] = pos
+        return result
@@ -46,26 +46,64 @@ import itertools
 import math
 import copy
 import os
+import io
+import multiprocessing
 from numpy import *
 
 # Given a candmap and a votemap, write the output in
 # Preflib format to the given file.
 def write_map(candmap, nvoters, votemap, file):
     # Write the header
-    file.write(str(len(candmap.keys())) + '\n')
+    out = [str(len(candmap.keys())) + '\n']
     # Make Candidate List
     for ele in sorted(candmap.keys()):
-        file.write(str(ele) + "," + str(candmap[ele]) + " \n")
+        out.append(str(ele) + "," + str(candmap[ele]) + " \n")
     # Write the Number of Voters, Total number of votes and Unique Orders...
-    file.write(str(nvoters) + "," + str(sum(votemap.values())) + "," + str(len(votemap.keys())) + "\n")
+    out.append(str(nvoters) + "," + str(sum(list(votemap.values()))) + "," + str(len(votemap.keys())) + "\n")
     # Write the votes.. (sorted by count)
     for vote, count in sorted(votemap.items(), key=lambda x: x[1], reverse=True):
-        file.write(str(count) + "," + vote + "\n")
-
-
-# Given a file in one of the Preflib Election Data
-# formats, return a list of rankmaps.
-def read_election_file(inputfile):
+        out.append(str(count) + "," + vote + "\n")
+    file.write("".join(out))
+
+
+# Given a list of counts and, for each order, its list of tiers
+# from most to least preferred, each a list of candidates, return
+# the Preflib line of each order. Tied candidates are put in braces.
+def format_orders(counts, tierslist):
+    lines = []
+    for count, tiers in zip(counts, tierslist):
+        bits = [str(count)]
+        for tier in tiers:
+            if len(tier) == 1:
+                bits.append(str(tier[0]))
+            else:
+                bits.append("{" + ",".join([str(c) for c in tier]) + "}")
+        lines.append(",".join(bits))
+    return lines
+
+
+# Given a candmap, the number of voters, the sum of the vote counts,
+# the number of unique orders and an iterable of (counts, tierslist)
+# batches as taken by format_orders, write the output in Preflib
+# format to the given file with one write per batch. Candidates are
+# listed in the order of candmap and the file does not end with a
+# newline, as in Profile.exportPreflibFile.
+def write_orders(candmap, nvoters, sumvotes, uniqueorders, batches, file):
+    out = [str(len(candmap))]
+    for ccand, name in candmap.items():
+        out.append("\n" + str(ccand) + "," + name)
+    out.append("\n" + str(nvoters) + "," + str(sumvotes) + "," + str(uniqueorders))
+    file.write("".join(out))
+    for counts, tierslist in batches:
+        lines = format_orders(counts, tierslist)
+        if len(lines) > 0:
+            file.write("\n" + "\n".join(lines))
+
+
+# Given a file in one of the Preflib Election Data formats, read
+# its header and return the candmap, the number of voters, the
+# sum of the vote counts and the number of unique orders.
+def read_election_header(inputfile):
     # first element is the number of candidates.
     l = inputfile.readline()
     numcands = int(l.strip())
@@ -80,42 +118,55 @@ def read_election_file(inputfile):
     sumvotes = int(bits[1].strip())
     uniqueorders = int(bits[2].strip())
 
+    return candmap, numvoters, sumvotes, uniqueorders
+
+
+# Given one order line of a Preflib Election Data file,
+# return its count and its rankmap.
+def parse_vote(rec):
+    rec = rec.strip()
+    # need to parse the rec properly..
+    if rec.find("{") == -1:
+        # its strict, just split on ,
+        count = int(rec[:rec.index(",")])
+        bits = rec[rec.index(",") + 1:].strip().split(",")
+        cvote = {}
+        for crank in range(len(bits)):
+            cvote[int(bits[crank])] = crank + 1
+    else:
+        count = int(rec[:rec.index(",")])
+        bits = rec[rec.index(",") + 1:].strip().split(",")
+        cvote = {}
+        crank = 1
+        partial = False
+        for ccand in bits:
+            if ccand.find("{") != -1:
+                partial = True
+                t = ccand.replace("{", "")
+                cvote[int(t.strip())] = crank
+            elif ccand.find("}") != -1:
+                partial = False
+                t = ccand.replace("}", "")
+                cvote[int(t.strip())] = crank
+                crank += 1
+            else:
+                cvote[int(ccand.strip())] = crank
+                if partial == False:
+                    crank += 1
+    return count, cvote
+
+
+# Given a file in one of the Preflib Election Data
+# formats, return a list of rankmaps.
+def read_election_file(inputfile):
+    candmap, numvoters, sumvotes, uniqueorders = read_election_header(inputfile)
+
     rankmaps = []
     rankmapcounts = []
     for i in range(uniqueorders):
-        rec = inputfile.readline().strip()
-        # need to parse the rec properly..
-        if rec.find("{") == -1:
-            # its strict, just split on ,
-            count = int(rec[:rec.index(",")])
-            bits = rec[rec.index(",") + 1:].strip().split(",")
-            cvote = {}
-            for crank in range(len(bits)):
-                cvote[int(bits[crank])] = crank + 1
-            rankmaps.append(cvote)
-            rankmapcounts.append(count)
-        else:
-            count = int(rec[:rec.index(",")])
-            bits = rec[rec.index(",") + 1:].strip().split(",")
-            cvote = {}
-            crank = 1
-            partial = False
-            for ccand in bits:
-                if ccand.find("{") != -1:
-                    partial = True
-                    t = ccand.replace("{", "")
-                    cvote[int(t.strip())] = crank
-                elif ccand.find("}") != -1:
-                    partial = False
-                    t = ccand.replace("}", "")
-                    cvote[int(t.strip())] = crank
-                    crank += 1
-                else:
-                    cvote[int(ccand.strip())] = crank
-                    if partial == False:
-                        crank += 1
-            rankmaps.append(cvote)
-            rankmapcounts.append(count)
+        count, cvote = parse_vote(inputfile.readline())
+        rankmaps.append(cvote)
+        rankmapcounts.append(count)
 
     # Sanity check:
     if sum(rankmapcounts) != sumvotes or len(rankmaps) != uniqueorders:
@@ -125,6 +176,127 @@ def read_election_file(inputfile):
     return candmap, rankmaps, rankmapcounts, numvoters
 
 
+# Given a list of order lines of a Preflib Election Data file and
+# a map from each candidate to its column, return an int16 array of
+# ranks, with 0 for unranked candidates, and an int64 array of counts.
+def orders_to_arrays(lines, candindex):
+    numcands = len(candindex)
+    rows = []
+    counts = []
+    for rec in lines:
+        count, cvote = parse_vote(rec)
+        row = [0] * numcands
+        for ccand, crank in cvote.items():
+            row[candindex[ccand]] = crank
+        rows.append(row)
+        counts.append(count)
+    return array(rows, dtype=int16).reshape(len(rows), numcands), array(counts, dtype=int64)
+
+
+# Given a file whose header has already been read by
+# read_election_header, yield its orders in chunks of at most
+# chunksize orders as returned by orders_to_arrays, with one column
+# per candidate in sorted order. Reading stops early if the file
+# ends before uniqueorders lines.
+def read_election_chunks(inputfile, candmap, uniqueorders, chunksize=65536):
+    candindex = {cand: j for j, cand in enumerate(sorted(candmap.keys()))}
+    read = 0
+    while read < uniqueorders:
+        lines = []
+        for i in range(min(chunksize, uniqueorders - read)):
+            rec = inputfile.readline()
+            if rec == "":
+                break
+            lines.append(rec)
+        if len(lines) == 0:
+            return
+        read += len(lines)
+        yield orders_to_arrays(lines, candindex)
+
+
+# Parse the order lines found between two byte offsets of a
+# Preflib Election Data file. This is the task run by each worker
+# of read_election_file_parallel.
+def parse_order_range(task):
+    filename, start, end, candindex = task
+    inf = open(filename, 'rb')
+    inf.seek(start)
+    data = inf.read(end - start)
+    inf.close()
+    # every range ends on a line boundary, so only the last split is empty.
+    # Blank lines are passed on and fail to parse, as in read_election_file.
+    lines = data.decode().split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    return orders_to_arrays(lines, candindex)
+
+
+# Given the name of a file in one of the Preflib Election Data
+# formats, split its uniqueorders order lines into byte ranges that
+# end on line boundaries and parse them in a pool of processes. Return the
+# candmap, the rank and count arrays of orders_to_arrays, with one
+# column per candidate in sorted order, and the number of voters.
+def read_election_file_parallel(filename, processes=None, numranges=None):
+    inf = open(filename, 'rb')
+    # read the header lines as bytes so that we know where the orders start.
+    first = inf.readline()
+    headerlines = [first] + [inf.readline() for i in range(int(first.strip()) + 1)]
+    candmap, numvoters, sumvotes, uniqueorders = read_election_header(
+        io.StringIO(b"".join(headerlines).decode()))
+    candindex = {cand: j for j, cand in enumerate(sorted(candmap.keys()))}
+
+    # find where the uniqueorders order lines end. Anything after them
+    # is ignored, as in read_election_file.
+    start = inf.tell()
+    end = start
+    remaining = uniqueorders
+    while remaining > 0:
+        block = inf.read(1 << 20)
+        if block == b"":
+            break
+        newlines = block.count(b"\n")
+        if newlines < remaining:
+            remaining -= newlines
+            end += len(block)
+        else:
+            pos = -1
+            for i in range(remaining):
+                pos = block.index(b"\n", pos + 1)
+            end += pos + 1
+            remaining = 0
+
+    # cut the order section into ranges, moving each cut to the start of a line.
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if numranges is None:
+        numranges = 4 * processes
+    step = max(1, (end - start) // numranges)
+    cuts = [start]
+    for pos in range(start + step, end, step):
+        inf.seek(pos - 1)
+        inf.readline()
+        if inf.tell() > cuts[-1] and inf.tell() < end:
+            cuts.append(inf.tell())
+    cuts.append(end)
+    inf.close()
+    tasks = [(filename, cuts[i], cuts[i + 1], candindex) for i in range(len(cuts) - 1)]
+
+    pool = multiprocessing.Pool(processes)
+    results = pool.map(parse_order_range, tasks)
+    pool.close()
+    pool.join()
+
+    ranks = concatenate([r[0] for r in results])
+    counts = concatenate([r[1] for r in results])
+
+    # Sanity check:
+    if sum(counts) != sumvotes or len(counts) != uniqueorders:
+        print("Error Parsing File: Votes Not Accounted For!")
+        exit()
+
+    return candmap, ranks, counts, numvoters
+
+
 # Given a pairwise map return the weighted and unweighted majority graphs.
 # and a boolean for isTournament.
 def pairwise_to_relation(candmap, pairwisemap):
@@ -285,17 +457,31 @@ def pp_profile_toscreen(candmap, rankmaps, rankmapcounts):
         print("{:^8}".format(str(srmapc[i])) + "|" + "{:^35}".format(str(outstr[:len(outstr) - 1])))
 
 
-# Evaluate a vote for a given score vector.
-def evaluate_scoring_rule(candmap, rankmaps, rankmapcounts, scorevec):
+# Given a candmap, a list of rankmaps and their counts, return an
+# m x m array whose entry [i, p] is the number of voters that rank
+# the i-th candidate in sorted order at position p + 1.
+def position_matrix(candmap, rankmaps, rankmapcounts):
+    candindex = {cand: j for j, cand in enumerate(sorted(candmap.keys()))}
+    positions = zeros((len(candmap), len(candmap)), dtype=int64)
+    for i in range(len(rankmaps)):
+        for j in rankmaps[i].keys():
+            positions[candindex[j], rankmaps[i][j] - 1] += rankmapcounts[i]
+    return positions
+
+
+# Evaluate a vote for a given score vector. The positions of the
+# votes can be given as computed by position_matrix or by
+# Profile.getPositionMatrix, otherwise they are counted here.
+def evaluate_scoring_rule(candmap, rankmaps, rankmapcounts, scorevec, positions=None):
     if len(scorevec) != len(candmap):
         print("Score Vector and Candidate Vector must have equal length")
         exit()
-    # initialize the score map.
-    scores = {x: 0 for x in candmap.keys()}
-    # for each rank map, for each rank, multiply...
-    for i in range(len(rankmaps)):
-        for j in rankmaps[i].keys():
-            scores[j] += rankmapcounts[i] * scorevec[rankmaps[i][j] - 1]
+    if positions is None:
+        positions = position_matrix(candmap, rankmaps, rankmapcounts)
+    # each score is the number of times at each rank times the score of that rank.
+    totals = dot(positions, array(scorevec)).tolist()
+    candindex = {cand: j for j, cand in enumerate(sorted(candmap.keys()))}
+    scores = {x: totals[candindex[x]] for x in candmap.keys()}
     return scores
 
 
@@ -2,14 +2,44 @@
 Author: Kevin J. Hwang
 """
 import copy
+import functools
+import gzip
 from . import prefpy_io
 import itertools
 import math
 import json
 import os
+import numpy as np
+from . import rankmatrix
 from .preference import Preference
 # import preference
 
+# The first bytes of every file written by Profile.exportBinary() and the version of its layout.
+BINARY_MAGIC = b"PREFPYRM"
+BINARY_VERSION = 1
+
+def cachedView(getter):
+    """
+    Decorates a method of Profile so that the view it derives from the preferences is computed once
+    for each set of arguments and then served from the cache of the Profile until the preferences
+    change.
+
+    :ivar function getter: The method that computes the view.
+    """
+
+    @functools.wraps(getter)
+    def getView(self, *args, **kwargs):
+        key = (getter.__name__, args, tuple(sorted(kwargs.items())))
+        if key in self._cache:
+            self.cacheHits += 1
+            return self._cache[key]
+        self.cacheMisses += 1
+        view = getter(self, *args, **kwargs)
+        self._cache[key] = view
+        return view
+
+    return getView
+
 class Profile():
     """
     The Profile class is the representation of an election Profile.
@@ -20,10 +50,29 @@ class Profile():
     :ivar list<Preference> preferences: Contains objects that represent preferences held over the
         candidates by individual voters.
     :ivar int numVoters: The number of voters in the election.   
+    :ivar int cacheHits: The number of times a derived view was served from the cache.
+    :ivar int cacheMisses: The number of times a derived view had to be computed.
+
+    A Profile can alternatively be stored densely as a rank matrix, see importRankMatrix(). In that
+    case the Preference objects are only generated if the preferences member is accessed.
+
+    Preferences can be added, removed and reweighted one at a time with addPreference(),
+    removePreference() and reweightPreference(). The callbacks registered with subscribe() are
+    told about each change, which lets an IncrementalTally keep its scores up to date. A dense
+    Profile makes these changes in place in buffers with spare rows, so the rank matrix and count
+    vector it returned before a change may see the change.
+
+    Derived views such as the rankMaps, the order vectors, the weighted majority graph and the
+    election type are computed once and shared between calls, so they must not be modified by the
+    caller. They are discarded whenever the preferences are replaced. After modifying the
+    preferences list or a Preference object in place, call clearCache().
     """
 
     def __init__(self, candMap, preferences):
 
+        self.cacheHits = 0
+        self.cacheMisses = 0
+        self._subscribers = []
         self.candMap = candMap
         self.numCands = len(candMap.keys())
         self.preferences = preferences
@@ -31,46 +80,251 @@ class Profile():
         for preference in preferences:
             self.numVoters += preference.count
 
+    @property
+    def preferences(self):
+        """
+        The list of Preference objects. For a dense Profile, they are generated from the rank
+        matrix the first time they are accessed.
+        """
+
+        if self._preferences is None:
+            rankMaps = rankmatrix.getRankMaps(self._rankMatrix, self.getCandList())
+            counts = self._counts.tolist()
+            preferences = []
+            for i in range(0, len(rankMaps)):
+                wmgMap = self.genWmgMapFromRankMap(rankMaps[i])
+                preferences.append(Preference(wmgMap, counts[i]))
+            self._preferences = preferences
+        return self._preferences
+
+    @preferences.setter
+    def preferences(self, preferences):
+        self._preferences = preferences
+        self._rankMatrix = None
+        self._counts = None
+        self._rankBuffer = None
+        self._countBuffer = None
+        self.clearCache()
+
+    def clearCache(self):
+        """
+        Discards every derived view computed so far. The hit and miss counters are kept.
+        """
+
+        self._cache = dict()
+        self._elecType = None
+
+    def isDense(self):
+        """
+        Returns True if the Profile is backed by a rank matrix and False otherwise.
+        """
+
+        return self._rankMatrix is not None
+
+    def compact(self):
+        """
+        Merges the preferences that represent the same ranking into a single preference whose count
+        is the sum of their counts. Merged preferences keep the position of their first occurrence
+        and the storage mode of the Profile is kept. Returns the compression ratio, that is, the
+        number of preferences before merging divided by the number after merging.
+        """
+
+        rankMatrix = self.getRankMatrix()
+        counts = self.getCountVector()
+        numEntries = rankMatrix.shape[0]
+        if numEntries == 0:
+            return 1.0
+
+        firstIndices, groups = rankmatrix.getUniqueRows(rankMatrix)
+        mergedCounts = np.zeros(len(firstIndices), dtype=rankmatrix.COUNT_DTYPE)
+        np.add.at(mergedCounts, groups, counts)
+
+        if self._rankMatrix is not None:
+            self.importRankMatrix(rankMatrix[firstIndices], mergedCounts, self.numVoters)
+        else:
+            preferences = []
+            mergedCounts = mergedCounts.tolist()
+            for i in range(0, len(firstIndices)):
+                wmgMap = self._preferences[firstIndices[i]].wmgMap
+                preferences.append(Preference(wmgMap, mergedCounts[i]))
+            self.preferences = preferences
+
+        return float(numEntries) / len(firstIndices)
+
+    def subscribe(self, callback):
+        """
+        Registers a function that is called after every change made by addPreference(),
+        removePreference() or reweightPreference(). The function is given the rank matrix row of
+        the preference that changed, as described in importRankMatrix(), and the signed change in
+        its count. Replacing all the preferences at once, for instance by importing a file, is not
+        reported.
+
+        :ivar function callback: The function to call.
+        """
+
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """
+        Stops calling a function registered with subscribe().
+
+        :ivar function callback: The function to stop calling.
+        """
+
+        self._subscribers.remove(callback)
+
+    def notifySubscribers(self, rankRow, countDelta):
+        """
+        Clears the derived views after a change to the preferences and passes the change on to the
+        subscribed callbacks.
+
+        :ivar ndarray rankRow: The rank matrix row of the preference that changed.
+        :ivar int countDelta: The signed change in the count of the preference.
+        """
+
+        self.numVoters += countDelta
+        self.clearCache()
+        for callback in list(self._subscribers):
+            callback(rankRow, countDelta)
+
+    def getRankRow(self, preference):
+        """
+        Returns the rank matrix row of a Preference object over the candidates of the current
+        Profile.
+
+        :ivar Preference preference: The preference to convert.
+        """
+
+        return rankmatrix.rankMapsToMatrix([preference.getRankMap()], self.getCandList())[0]
+
+    def addPreference(self, preference):
+        """
+        Appends a Preference object to the current Profile. A dense Profile stores its rank matrix
+        row instead.
+
+        :ivar Preference preference: The preference to add, with its count.
+        """
+
+        rankRow = self.getRankRow(preference)
+        if self._rankMatrix is not None:
+            numRows = self._rankMatrix.shape[0]
+            self._reserveRows(numRows + 1)
+            self._rankBuffer[numRows] = rankRow
+            self._countBuffer[numRows] = preference.count
+            self._rankMatrix = self._rankBuffer[:numRows + 1]
+            self._counts = self._countBuffer[:numRows + 1]
+            self._preferences = None
+        else:
+            self._preferences.append(preference)
+        self.notifySubscribers(rankRow, preference.count)
+
+    def removePreference(self, index):
+        """
+        Removes the preference at the given position, counting the rows of a dense Profile.
+
+        :ivar int index: The position of the preference to remove.
+        """
+
+        if self._rankMatrix is not None:
+            numRows = self._rankMatrix.shape[0]
+            index = range(0, numRows)[index]
+            rankRow = self._rankMatrix[index].copy()
+            count = int(self._counts[index])
+            self._reserveRows(numRows)
+            # Only the rows after the removed one move, within the buffers.
+            self._rankBuffer[index:numRows - 1] = self._rankBuffer[index + 1:numRows]
+            self._countBuffer[index:numRows - 1] = self._countBuffer[index + 1:numRows]
+            self._rankMatrix = self._rankBuffer[:numRows - 1]
+            self._counts = self._countBuffer[:numRows - 1]
+            self._preferences = None
+        else:
+            preference = self._preferences.pop(index)
+            rankRow = self.getRankRow(preference)
+            count = preference.count
+        self.notifySubscribers(rankRow, -count)
+
+    def reweightPreference(self, index, count):
+        """
+        Changes the number of voters who hold the preference at the given position.
+
+        :ivar int index: The position of the preference to reweight.
+        :ivar int count: The new number of voters who hold the preference.
+        """
+
+        if self._rankMatrix is not None:
+            rankRow = self._rankMatrix[index].copy()
+            countDelta = count - int(self._counts[index])
+            self._reserveRows(self._rankMatrix.shape[0])
+            self._counts[index] = count
+            self._preferences = None
+        else:
+            rankRow = self.getRankRow(self._preferences[index])
+            countDelta = count - self._preferences[index].count
+            self._preferences[index].count = count
+        self.notifySubscribers(rankRow, countDelta)
+
+    def getCandList(self):
+        """
+        Returns a sorted list of the integer representations of the candidates. This is the column
+        order of the rank matrix.
+        """
+
+        return sorted(self.candMap.keys())
+
+    @cachedView
+    def getRankMatrix(self):
+        """
+        Returns an (n, m) int16 array with one row per preference and one column per candidate, in
+        the order given by getCandList(). Each entry is the position of the candidate in the
+        ranking, starting from 1, or 0 if the candidate is unranked.
+        """
+
+        if self._rankMatrix is not None:
+            return self._rankMatrix
+        rankMaps = [preference.getRankMap() for preference in self._preferences]
+        return rankmatrix.rankMapsToMatrix(rankMaps, self.getCandList())
+
+    @cachedView
+    def getCountVector(self):
+        """
+        Returns an int64 array of the number of times each preference is given.
+        """
+
+        if self._counts is not None:
+            return self._counts
+        return np.array(self.getPreferenceCounts(), dtype=rankmatrix.COUNT_DTYPE)
+
     def getElecType(self): 
         """
         Determines whether the list of Preference objects represents complete strict orderings over
         the candidates (soc), incomplete strict orderings (soi), complete orderings with ties (toc), 
-        or incomplete orderings with ties (toi). WARNING: elections that do not fall under the 
-        above four categories may be falsely identified.
+        or incomplete orderings with ties (toi). The election type is derived from the rank matrix
+        in a single pass and recorded on the Profile, which is done as soon as a file or a rank
+        matrix is imported.
         """
 
-        tiesPresent = False
-        incompletePresent = False
-
-        # Go through the list of Preferences and see if any contain a tie or are incomplete.
-        for preference in self.preferences:
-            if preference.containsTie() == True:
-                tiesPresent = True
-                break
-            if preference.isFullPreferenceOrder(self.candMap.keys()) == False:
-                incompletePresent = True
-                break
-
-        if tiesPresent == False and incompletePresent == False:
-            elecType = "soc"
-        elif tiesPresent == False and incompletePresent == True:
-            elecType = "soi"
-        elif tiesPresent == True and incompletePresent == False:
-            elecType = "toc"
-        elif tiesPresent == True and incompletePresent == True:
-            elecType = "toi"
-        return elecType
+        if self._elecType is not None:
+            self.cacheHits += 1
+            return self._elecType
+        self.cacheMisses += 1
+        self._elecType = rankmatrix.getElecType(self.getRankMatrix())
+        return self._elecType
 
+    @cachedView
     def getPreferenceCounts(self):
         """
         Returns a list of the number of times each preference is given.
         """
 
+        if self._counts is not None:
+            return self._counts.tolist()
+
         preferenceCounts = []
         for preference in self.preferences:
             preferenceCounts.append(preference.count)
         return preferenceCounts
 
+    @cachedView
     def getRankMaps(self):
         """
         Returns a list of dictionaries, one for each preference, that associates the integer 
@@ -78,10 +332,15 @@ class Profile():
         returns a list of the number of times each preference is given.
         """
 
+        if self._rankMatrix is not None:
+            return rankmatrix.getRankMaps(self._rankMatrix, self.getCandList())
+
         rankMaps = []
         for preference in self.preferences:
             rankMaps.append(preference.getRankMap())
         return rankMaps
+
+    @cachedView
     def getReverseRankMaps(self):
         """
         Returns a list of dictionaries, one for each preference, that associates each position in
@@ -89,11 +348,15 @@ class Profile():
         position and returns a list of the number of times each preference is given.
         """
 
+        if self._rankMatrix is not None:
+            return rankmatrix.getReverseRankMaps(self._rankMatrix, self.getCandList())
+
         reverseRankMaps = []
         for preference in self.preferences:
             reverseRankMaps.append(preference.getReverseRankMap())
         return reverseRankMaps
 
+    @cachedView
     def getOrderVectors(self):
         """
         Returns a list of lists, one for each preference, of candidates ordered from most preferred
@@ -101,11 +364,15 @@ class Profile():
         the number of times each preference is given.
         """
 
+        if self._rankMatrix is not None:
+            return rankmatrix.getOrderVectors(self._rankMatrix, self.getCandList())
+
         orderVectors = []
         for preference in self.preferences:
             orderVectors.append(preference.getOrderVector())
         return orderVectors
 
+    @cachedView
     def getOrderVectorsEGMM(self):
         """
         Returns a list of lists, one for each preference, of candidates ordered from most preferred
@@ -113,11 +380,15 @@ class Profile():
         the number of times each preference is given.
         """
 
+        if self._rankMatrix is not None:
+            return rankmatrix.getOrderVectorsEGMM(self._rankMatrix, self.getCandList())
+
         orderVectors = []
         for preference in self.preferences:
             orderVectors.append(preference.getOrderVectorEGMM())
         return orderVectors
 
+    @cachedView
     def getWmg(self, normalize = False):
         """
         Generate a weighted majority graph that represents the whole profile. The function will
@@ -129,35 +400,67 @@ class Profile():
             where each edge has been divided by the value of the largest edge.
         """
 
-        # Initialize a new dictionary for our final weighted majority graph.
-        wmgMap = dict()
-        for cand in self.candMap.keys():
-            wmgMap[cand] = dict()
-        for cand1, cand2 in itertools.combinations(self.candMap.keys(), 2):
-            wmgMap[cand1][cand2] = 0
-            wmgMap[cand2][cand1] = 0
-
-        # Go through the wmgMaps and increment the value of each edge in our final graph with the 
-        # edges in each of the wmgMaps. We take into account the number of times that the vote 
-        # occured.
-        for i in range(0, len(self.preferences)):
-            preference = self.preferences[i]
-            preferenceWmgMap = preference.wmgMap
-            for cand1, cand2 in itertools.combinations(preferenceWmgMap.keys(), 2):
-                if cand2 in preferenceWmgMap[cand1].keys():
-                    wmgMap[cand1][cand2] += preferenceWmgMap[cand1][cand2]*preference.count
-                    wmgMap[cand2][cand1] += preferenceWmgMap[cand2][cand1]*preference.count
-
-        # By default, we assume that the weighted majority graph should not be normalized. If
-        # desired, we normalize by dividing each edge by the value of the largest edge. 
-        if (normalize == True):
-            maxEdge = float('-inf')
-            for cand in wmgMap.keys():
-                maxEdge = max(maxEdge, max(wmgMap[cand].values()))
-            for cand1 in wmgMap.keys():
-                for cand2 in wmgMap[cand1].keys():
-                    wmgMap[cand1][cand2] = float(wmgMap[cand1][cand2])/maxEdge
-        
+        # The normalized graph is derived from a copy of the cached graph.
+        if normalize == True:
+            return self.normalizeWmgMap(copy.deepcopy(self.getWmg()))
+
+        return rankmatrix.wmgMatrixToMap(self.getWmgMatrix(), self.getCandList())
+
+    @cachedView
+    def getWmgMatrix(self):
+        """
+        Returns the weighted majority graph of the whole profile as an (m, m) int64 array, with
+        rows and columns in the order given by getCandList(). Entry [i, j] is the number of times
+        the i-th candidate is ranked above the j-th candidate minus the number of times the j-th
+        candidate is ranked above the i-th candidate.
+        """
+
+        pairwise = self.getPairwiseMatrix()
+        return pairwise - pairwise.T
+
+    @cachedView
+    def getPairwiseMatrix(self, unrankedLast = False):
+        """
+        Returns an (m, m) int64 array, with rows and columns in the order given by getCandList(),
+        whose entry [i, j] is the number of times the i-th candidate is ranked strictly above the
+        j-th candidate.
+
+        :ivar bool unrankedLast: If unrankedLast is True, unranked candidates are considered to be
+            ranked below all ranked candidates. Otherwise, votes that leave either candidate
+            unranked do not count towards that pair.
+        """
+
+        # When every vote ranks every candidate, unrankedLast makes no difference and both views
+        # can share one matrix.
+        if unrankedLast == True and self.getElecType() in ("soc", "toc"):
+            return self.getPairwiseMatrix()
+        return rankmatrix.getPairwiseMatrix(self.getRankMatrix(), self.getCountVector(), unrankedLast)
+
+    @cachedView
+    def getPositionMatrix(self):
+        """
+        Returns an (m, m) int64 array whose entry [i, p] is the number of voters who rank the i-th
+        candidate of getCandList() at position p + 1. Tied candidates share the position of their
+        tier, as in the rankMaps, and unranked candidates are not counted.
+        """
+
+        return rankmatrix.getPositionMatrix(self.getRankMatrix(), self.getCountVector())
+
+    def normalizeWmgMap(self, wmgMap):
+        """
+        Divides each edge of a weighted majority graph by the value of the largest edge. This is
+        called by getWmg().
+
+        :ivar dict<int,dict<int,int>> wmgMap: A two-dimensional dictionary that represents a
+            weighted majority graph.
+        """
+
+        maxEdge = float('-inf')
+        for cand in wmgMap.keys():
+            maxEdge = max(maxEdge, max(wmgMap[cand].values()))
+        for cand1 in wmgMap.keys():
+            for cand2 in wmgMap[cand1].keys():
+                wmgMap[cand1][cand2] = float(wmgMap[cand1][cand2])/maxEdge
         return wmgMap
 
     #----------------------------------------------------------------------------------------------
@@ -198,11 +501,13 @@ class Profile():
 
         return wmgMap
 
-    def exportPreflibFile(self, fileName):
+    def exportPreflibFile(self, fileName, compress = False, batchSize = 65536):
         """
         Exports a preflib format file that contains all the information of the current Profile.
 
         :ivar str fileName: The name of the output file to be exported.
+        :ivar bool compress: If compress is True, the file is compressed with gzip.
+        :ivar int batchSize: The number of votes formatted and written at a time.
         """
 
         elecType = self.getElecType()
@@ -211,54 +516,44 @@ class Profile():
             print("ERROR: printing current type to preflib format is not supported")
             exit()
 
-        # Generate a list of reverse rankMaps, one for each vote. This will allow us to easiliy
-        # identify ties.
-        reverseRankMaps = self.getReverseRankMaps()
-
-        outfileObj = open(fileName, 'w')
-
-        # Print the number of candidates and the integer representation and name of each candidate.
-        outfileObj.write(str(self.numCands))
-        for candInt, cand in self.candMap.items():
-            outfileObj.write("\n" + str(candInt) + "," + cand)
-
         # Sum up the number of preferences that are represented.
-        preferenceCount = 0
-        for preference in self.preferences:
-            preferenceCount += preference.count
-
-        # Print the number of voters, the sum of vote count, and the number of unique orders.
-        outfileObj.write("\n" + str(self.numVoters) + "," + str(preferenceCount) + "," + str(len(self.preferences)))
-
-        for i in range(0, len(reverseRankMaps)):
-
-            # First, print the number of times the preference appears.
-            outfileObj.write("\n" + str(self.preferences[i].count))
-            
-            reverseRankMap = reverseRankMaps[i]
-
-            # We sort the positions in increasing order and print the candidates at each position
-            # in order.
-            sortedKeys = sorted(reverseRankMap.keys())
-            for key in sortedKeys:
+        preferenceCounts = self.getPreferenceCounts()
+        preferenceCount = sum(preferenceCounts)
+
+        if compress == True:
+            outfileObj = gzip.open(fileName, 'wt')
+        else:
+            outfileObj = open(fileName, 'w')
+        prefpy_io.write_orders(self.candMap, self.numVoters, preferenceCount,
+            len(preferenceCounts), self.genPreflibBatches(batchSize), outfileObj)
+        outfileObj.close()
+
+    def genPreflibBatches(self, batchSize):
+        """
+        Generates the votes of the current Profile batchSize at a time, as a list of counts and a
+        list of the tiers of each vote, for prefpy_io.write_orders(). A dense Profile reads its
+        tiers directly from the rank matrix. Otherwise, they are read from the reverse rankMaps so
+        that tied candidates keep the order of the Preference objects.
 
-                cands = reverseRankMap[key]
+        :ivar int batchSize: The number of votes in each batch.
+        """
 
-                # If only one candidate is in a particular position, we assume there is no tie.
-                if len(cands) == 1:
-                    outfileObj.write("," + str(cands[0]))
+        preferenceCounts = self.getPreferenceCounts()
+        if self.isDense():
+            candList = self.getCandList()
+            for start in range(0, len(preferenceCounts), batchSize):
+                tiersList = rankmatrix.getTiers(self._rankMatrix[start:start + batchSize], candList)
+                yield preferenceCounts[start:start + batchSize], tiersList
+            return
 
-                # If more than one candidate is in a particular position, they are tied. We print
-                # brackets around the candidates.
-                elif len(cands) > 1:
-                    outfileObj.write(",{" + str(cands[0]))
-                    for j in range(1, len(cands)):
-                        outfileObj.write("," + str(cands[j]))
-                    outfileObj.write("}")
-                    
-        outfileObj.close()            
+        reverseRankMaps = self.getReverseRankMaps()
+        for start in range(0, len(preferenceCounts), batchSize):
+            tiersList = []
+            for reverseRankMap in reverseRankMaps[start:start + batchSize]:
+                tiersList.append([reverseRankMap[key] for key in sorted(reverseRankMap.keys())])
+            yield preferenceCounts[start:start + batchSize], tiersList
 
-    def importPreflibFile(self, fileName):
+    def importPreflibFile(self, fileName, dense = False, chunkSize = 65536, processes = None):
         """
         Imports a preflib format file that contains all the information of a Profile. This function
         will completely override all members of the current Profile object. Currently, we assume 
@@ -267,21 +562,222 @@ class Profile():
         discrepancies when importing and exporting a .toi preflib file or a .soi preflib file.
 
         :ivar str fileName: The name of the input file to be imported.
+        :ivar bool dense: If dense is True, the votes are stored in a rank matrix instead of one
+            Preference object per vote. Votes that rank a single candidate are then kept as is.
+            The file is then read incrementally so that only chunkSize votes are parsed at a time.
+        :ivar int chunkSize: The number of votes parsed at a time when dense is True.
+        :ivar int processes: If processes is not None and dense is True, the votes are parsed in
+            parallel by that many processes, see importPreflibFileDense().
         """
 
+        if dense == True:
+            self.importPreflibFileDense(fileName, chunkSize, processes)
+            return
+
         # Use the functionality found in io to read the file.
         elecFileObj = open(fileName, 'r')
-        self.candMap, rankMaps, wmgMapsCounts, self.numVoters = prefpy_io.read_election_file(elecFileObj)
+        candMap, rankMaps, wmgMapsCounts, numVoters = prefpy_io.read_election_file(elecFileObj)
         elecFileObj.close()
 
+        self.candMap = candMap
         self.numCands = len(self.candMap.keys())
 
         # Go through the rankMaps and generate a wmgMap for each vote. Use the wmgMap to create a
         # Preference object.
-        self.preferences = []
+        preferences = []
         for i in range(0, len(rankMaps)):
             wmgMap = self.genWmgMapFromRankMap(rankMaps[i])
-            self.preferences.append(Preference(wmgMap, wmgMapsCounts[i]))
+            preferences.append(Preference(wmgMap, wmgMapsCounts[i]))
+        self.preferences = preferences
+        self.numVoters = numVoters
+
+        # Record the election type while the rankMaps are at hand.
+        rankMatrix = rankmatrix.rankMapsToMatrix(rankMaps, self.getCandList())
+        self._elecType = rankmatrix.getElecType(rankMatrix)
+
+    def importPreflibFileDense(self, fileName, chunkSize = 65536, processes = None):
+        """
+        Imports a preflib format file into a rank matrix. The votes are parsed chunkSize at a time
+        and copied into a rank matrix allocated from the header of the file, so the memory used
+        beyond the rank matrix itself is bounded by the size of a chunk. This function will
+        completely override all members of the current Profile object.
+
+        :ivar str fileName: The name of the input file to be imported.
+        :ivar int chunkSize: The number of votes parsed at a time.
+        :ivar int processes: If processes is not None, the file is instead split into byte ranges
+            that are parsed by a pool of that many processes, see
+            prefpy_io.read_election_file_parallel(). The whole file is then parsed at once.
+        """
+
+        if processes is not None:
+            candMap, rankMatrix, counts, numVoters = prefpy_io.read_election_file_parallel(fileName,
+                processes)
+            self.candMap = candMap
+            self.numCands = len(candMap.keys())
+            self._setRankMatrix(rankMatrix, counts, numVoters, rankmatrix.getElecType(rankMatrix))
+            return
+
+        elecFileObj = open(fileName, 'r')
+        candMap, numVoters, sumVotes, uniqueOrders = prefpy_io.read_election_header(elecFileObj)
+        numCands = len(candMap.keys())
+        rankMatrix = np.zeros((uniqueOrders, numCands), dtype=rankmatrix.RANK_DTYPE)
+        counts = np.zeros(uniqueOrders, dtype=rankmatrix.COUNT_DTYPE)
+        numRows = 0
+        for ranks, chunkCounts in prefpy_io.read_election_chunks(elecFileObj, candMap,
+                uniqueOrders, chunkSize):
+            rankMatrix[numRows:numRows + len(chunkCounts)] = ranks
+            counts[numRows:numRows + len(chunkCounts)] = chunkCounts
+            numRows += len(chunkCounts)
+        elecFileObj.close()
+
+        # Apply the same sanity check as prefpy_io.read_election_file().
+        if int(counts.sum()) != sumVotes or numRows != uniqueOrders:
+            print("Error Parsing File: Votes Not Accounted For!")
+            exit()
+
+        self.candMap = candMap
+        self.numCands = numCands
+        self._setRankMatrix(rankMatrix, counts, numVoters, rankmatrix.getElecType(rankMatrix))
+
+    def importRankMatrix(self, rankMatrix, counts = None, numVoters = None):
+        """
+        Replaces the preferences of the current Profile with a dense rank matrix over the
+        candidates of candMap. No Preference objects are created.
+
+        :ivar ndarray rankMatrix: An (n, m) array with one row per preference and one column per
+            candidate, in the order given by getCandList(). Each entry is the position of the
+            candidate in the ranking, starting from 1 with tied candidates sharing a position, or 0
+            if the candidate is unranked.
+        :ivar list<int> counts: The number of times each preference is given. Defaults to once.
+        :ivar int numVoters: The number of voters in the election. Defaults to the sum of counts.
+        """
+
+        rankMatrix = np.asarray(rankMatrix, dtype=rankmatrix.RANK_DTYPE)
+        if rankMatrix.ndim != 2 or rankMatrix.shape[1] != self.numCands:
+            raise ValueError("rank matrix must have one column per candidate")
+        if counts is None:
+            counts = np.ones(rankMatrix.shape[0], dtype=rankmatrix.COUNT_DTYPE)
+        counts = np.asarray(counts, dtype=rankmatrix.COUNT_DTYPE)
+        if counts.shape != (rankMatrix.shape[0],):
+            raise ValueError("counts must have one entry per row of the rank matrix")
+
+        if numVoters is None:
+            numVoters = int(counts.sum())
+        self._setRankMatrix(rankMatrix, counts, numVoters, rankmatrix.getElecType(rankMatrix))
+
+    def _setRankMatrix(self, rankMatrix, counts, numVoters, elecType):
+        """
+        Stores an already validated rank matrix and count vector as the preferences of the current
+        Profile, without copying them.
+        """
+
+        self._preferences = None
+        self._rankMatrix = rankMatrix
+        self._counts = counts
+        self._rankBuffer = None
+        self._countBuffer = None
+        self.clearCache()
+        self._elecType = elecType
+        self.numVoters = numVoters
+
+    def _reserveRows(self, numRows):
+        """
+        Makes room for at least numRows rows in the rank matrix and count vector of a dense Profile.
+        Both become views of buffers owned by the Profile, so they can be changed in place even
+        when they were memory-mapped or given to importRankMatrix(). A buffer that is too small is
+        replaced by one at least twice as large, so adding preferences one at a time copies each
+        row a constant number of times on average.
+
+        :ivar int numRows: The number of rows needed.
+        """
+
+        if self._rankBuffer is not None and numRows <= self._rankBuffer.shape[0]:
+            return
+        currentRows = self._rankMatrix.shape[0]
+        capacity = currentRows
+        if numRows > currentRows:
+            capacity = max(numRows, 2 * currentRows, 16)
+        self._rankBuffer = np.zeros((capacity, self.numCands), dtype=self._rankMatrix.dtype)
+        self._rankBuffer[:currentRows] = self._rankMatrix
+        self._countBuffer = np.zeros(capacity, dtype=rankmatrix.COUNT_DTYPE)
+        self._countBuffer[:currentRows] = self._counts
+        self._rankMatrix = self._rankBuffer[:currentRows]
+        self._counts = self._countBuffer[:currentRows]
+
+    def exportBinary(self, fileName):
+        """
+        Exports a binary file that contains the candidates and the rank matrix of the current
+        Profile. The file can be memory-mapped by openBinary() without being parsed.
+
+        The file starts with the 8 byte magic string BINARY_MAGIC and the length of a JSON header as
+        a little-endian 64 bit integer. The header holds the candMap, numVoters, the election type
+        and the shape of the rank matrix, and is padded with spaces so that the data that follows is
+        aligned on 64 bytes. Then comes the count vector, as little-endian 64 bit integers, and the
+        rank matrix in row-major order, as little-endian 16 bit integers.
+
+        :ivar str fileName: The name of the output file to be exported.
+        """
+
+        rankMatrix = self.getRankMatrix()
+        counts = self.getCountVector()
+
+        header = dict()
+        header["version"] = BINARY_VERSION
+        header["candMap"] = [[cand, self.candMap[cand]] for cand in self.getCandList()]
+        header["numVoters"] = self.numVoters
+        header["elecType"] = self.getElecType()
+        header["numRows"] = rankMatrix.shape[0]
+        header["numCands"] = rankMatrix.shape[1]
+        headerBytes = json.dumps(header).encode("utf-8")
+        dataOffset = len(BINARY_MAGIC) + 8 + len(headerBytes)
+        headerBytes += b" " * (-dataOffset % 64)
+
+        outfile = open(fileName, 'wb')
+        outfile.write(BINARY_MAGIC)
+        outfile.write(np.array(len(headerBytes), dtype="<u8").tobytes())
+        outfile.write(headerBytes)
+        np.ascontiguousarray(counts, dtype="<i8").tofile(outfile)
+        np.ascontiguousarray(rankMatrix, dtype="<i2").tofile(outfile)
+        outfile.close()
+
+    def openBinary(self, fileName):
+        """
+        Opens a binary file written by exportBinary(). The rank matrix and the count vector are
+        memory-mapped read-only rather than read into memory, so the Profile becomes dense and the
+        file must not be modified while it is in use. This function will completely override all
+        members of the current Profile object.
+
+        :ivar str fileName: The name of the input file to be opened.
+        """
+
+        infile = open(fileName, 'rb')
+        magic = infile.read(len(BINARY_MAGIC))
+        if magic != BINARY_MAGIC:
+            infile.close()
+            raise ValueError("%s is not a binary profile file" % fileName)
+        headerLength = int(np.frombuffer(infile.read(8), dtype="<u8")[0])
+        header = json.loads(infile.read(headerLength).decode("utf-8"))
+        infile.close()
+        if header["version"] != BINARY_VERSION:
+            raise ValueError("unsupported binary profile version %s" % header["version"])
+
+        candMap = dict()
+        for cand, name in header["candMap"]:
+            candMap[int(cand)] = name
+        self.candMap = candMap
+        self.numCands = len(candMap)
+
+        numRows = int(header["numRows"])
+        dataOffset = len(BINARY_MAGIC) + 8 + headerLength
+        if numRows == 0:
+            counts = np.zeros(0, dtype=rankmatrix.COUNT_DTYPE)
+            rankMatrix = np.zeros((0, self.numCands), dtype=rankmatrix.RANK_DTYPE)
+        else:
+            counts = np.memmap(fileName, dtype="<i8", mode='r', offset=dataOffset,
+                shape=(numRows,))
+            rankMatrix = np.memmap(fileName, dtype="<i2", mode='r', offset=dataOffset + 8*numRows,
+                shape=(numRows, self.numCands))
+        self._setRankMatrix(rankMatrix, counts, int(header["numVoters"]), header["elecType"])
 
     def exportJsonFile(self, fileName):
         """
@@ -291,19 +787,19 @@ class Profile():
         """
 
         # Because our Profile class is not directly JSON serializable, we exporrt the underlying 
-        # dictionary. 
+        # members. 
         data = dict()
-        for key in self.__dict__.keys():
-            if key != "preferences":
-                data[key] = self.__dict__[key]
+        data["candMap"] = self.candMap
+        data["numCands"] = self.numCands
+        data["numVoters"] = self.numVoters
         
         # The Preference class is also not directly JSON serializable, so we export the underlying
-        # dictionary for each Preference object.
+        # members of each Preference object.
         preferenceDicts = []
         for preference in self.preferences:
             preferenceDict = dict()
-            for key in preference.__dict__.keys():
-                preferenceDict[key] = preference.__dict__[key]
+            preferenceDict["wmgMap"] = preference.wmgMap
+            preferenceDict["count"] = preference.count
             preferenceDicts.append(preferenceDict)
         data["preferences"] = preferenceDicts
 
@@ -337,7 +833,7 @@ class Profile():
         # The Preference class is also not directly JSON serializable, so we exported the 
         # underlying dictionary for each Preference object. When we import, we will create a 
         # Preference object from these dictionaries.
-        self.preferences = []
+        preferences = []
         for preferenceMap in data["preferences"]:
             count = int(preferenceMap["count"])
 
@@ -350,6 +846,7 @@ class Profile():
                 for key2 in preferenceWmgMap[key].keys():
                     wmgMap[int(key)][int(key2)] = int(preferenceWmgMap[key][key2])
 
-            self.preferences.append(Preference(wmgMap, count))
+            preferences.append(Preference(wmgMap, count))
+        self.preferences = preferences
 
     #----------------------------------------------------------------------------------------------
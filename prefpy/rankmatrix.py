@@ -0,0 +1,358 @@
+"""
+Array kernels over the dense rank matrix representation of a Profile.
+
+A rank matrix is an (n, m) integer array with one row per unique preference and one column per
+candidate, in increasing order of the candidates' integer representations. Each entry holds the
+position of the candidate in the ranking, starting from 1, with tied candidates sharing a position
+exactly as in Preference.getRankMap(). Candidates that a vote does not rank are given position 0.
+The rank matrix is always paired with a count vector holding the number of voters of each row.
+"""
+import numpy as np
+
+RANK_DTYPE = np.int16
+COUNT_DTYPE = np.int64
+
+
+def rankMapsToMatrix(rankMaps, candList):
+    """
+    Returns the rank matrix of a list of rankMaps.
+
+    :ivar list<dict<int,int>> rankMaps: Associates integer representations of each candidate with
+        its position in the ranking, one dictionary per preference.
+    :ivar list<int> candList: The integer representations of the candidates in column order.
+    """
+
+    candIndex = dict()
+    for j in range(0, len(candList)):
+        candIndex[candList[j]] = j
+
+    rows = []
+    for rankMap in rankMaps:
+        row = [0] * len(candList)
+        for cand, rank in rankMap.items():
+            row[candIndex[cand]] = rank
+        rows.append(row)
+    return np.array(rows, dtype=RANK_DTYPE).reshape(len(rankMaps), len(candList))
+
+
+def getUniqueRows(rankMatrix):
+    """
+    Groups identical rows of the rank matrix. Returns an int array with the index of the first
+    occurrence of each distinct row, in order of first occurrence, and an int array that associates
+    each row with the position of its group in the first array.
+
+    :ivar ndarray rankMatrix: The (n, m) rank matrix.
+    """
+
+    numVotes, numCands = rankMatrix.shape
+    if numVotes == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    if numCands == 0:
+        return np.zeros(1, dtype=np.intp), np.zeros(numVotes, dtype=np.intp)
+
+    # Each row is hashed as a single opaque value made of its bytes.
+    rows = np.ascontiguousarray(rankMatrix, dtype=RANK_DTYPE)
+    rowKeys = rows.view(np.dtype((np.void, rows.dtype.itemsize * numCands))).ravel()
+    firstIndices, inverse = np.unique(rowKeys, return_index=True, return_inverse=True)[1:]
+
+    # np.unique orders the groups by value, so we renumber them by first occurrence.
+    order = np.argsort(firstIndices, kind="stable")
+    groupPositions = np.empty(len(order), dtype=np.intp)
+    groupPositions[order] = np.arange(len(order))
+    return firstIndices[order], groupPositions[inverse.ravel()]
+
+
+def getTiers(rankMatrix, candList):
+    """
+    Returns a list, one for each row of the rank matrix, of lists of tiers. Each tier is a list of
+    the candidates ranked at the same position, and tiers are ordered from most preferred to least.
+    Candidates within a tier are listed in increasing order and unranked candidates are omitted.
+
+    :ivar ndarray rankMatrix: The (n, m) rank matrix.
+    :ivar list<int> candList: The integer representations of the candidates in column order.
+    """
+
+    # A stable sort keeps tied candidates in column order. Unranked candidates sort first because
+    # their position is 0, so we skip over them.
+    orders = np.argsort(rankMatrix, axis=1, kind="stable").tolist()
+    rows = rankMatrix.tolist()
+    tiersList = []
+    for row, order in zip(rows, orders):
+        tiers = []
+        prevRank = 0
+        for j in order:
+            rank = row[j]
+            if rank == 0:
+                continue
+            if rank != prevRank:
+                tiers.append([candList[j]])
+                prevRank = rank
+            else:
+                tiers[-1].append(candList[j])
+        tiersList.append(tiers)
+    return tiersList
+
+
+def getRankMaps(rankMatrix, candList):
+    """
+    Returns a list of dictionaries, one for each row of the rank matrix, that associates the integer
+    representation of each ranked candidate with its position in the ranking.
+
+    :ivar ndarray rankMatrix: The (n, m) rank matrix.
+    :ivar list<int> candList: The integer representations of the candidates in column order.
+    """
+
+    rankMaps = []
+    for tiers in getTiers(rankMatrix, candList):
+        rankMap = dict()
+        for pos in range(0, len(tiers)):
+            for cand in tiers[pos]:
+                rankMap[cand] = pos + 1
+        rankMaps.append(rankMap)
+    return rankMaps
+
+
+def getReverseRankMaps(rankMatrix, candList):
+    """
+    Returns a list of dictionaries, one for each row of the rank matrix, that associates each
+    position in the ranking with a list of the candidates ranked at that position.
+
+    :ivar ndarray rankMatrix: The (n, m) rank matrix.
+    :ivar list<int> candList: The integer representations of the candidates in column order.
+    """
+
+    reverseRankMaps = []
+    for tiers in getTiers(rankMatrix, candList):
+        reverseRankMap = dict()
+        for pos in range(0, len(tiers)):
+            reverseRankMap[pos + 1] = tiers[pos]
+        reverseRankMaps.append(reverseRankMap)
+    return reverseRankMaps
+
+
+def getOrderVectors(rankMatrix, candList):
+    """
+    Returns a list of lists, one for each row of the rank matrix, that contains the first candidate
+    of each tier ordered from most preferred to least, as Preference.getOrderVector() does.
+
+    :ivar ndarray rankMatrix: The (n, m) rank matrix.
+    :ivar list<int> candList: The integer representations of the candidates in column order.
+    """
+
+    orderVectors = []
+    for tiers in getTiers(rankMatrix, candList):
+        orderVectors.append([tier[0] for tier in tiers])
+    return orderVectors
+
+
+def getOrderVectorsEGMM(rankMatrix, candList):
+    """
+    Returns a list of lists, one for each row of the rank matrix, that associates each candidate,
+    used as an index, with the number of tiers ranked above it, as Preference.getOrderVectorEGMM()
+    does.
+
+    :ivar ndarray rankMatrix: The (n, m) rank matrix.
+    :ivar list<int> candList: The integer representations of the candidates in column order.
+    """
+
+    orderVectors = []
+    for tiers in getTiers(rankMatrix, candList):
+        result = [0] * sum(len(tier) for tier in tiers)
+        for pos in range(0, len(tiers)):
+            for cand in tiers[pos]:
+                result[cand] = pos
+        orderVectors.append(result)
+    return orderVectors
+
+
+def getElecType(rankMatrix):
+    """
+    Determines whether the rows of the rank matrix represent complete strict orderings over the
+    candidates (soc), incomplete strict orderings (soi), complete orderings with ties (toc), or
+    incomplete orderings with ties (toi).
+
+    :ivar ndarray rankMatrix: The (n, m) rank matrix.
+    """
+
+    if rankMatrix.shape[0] == 0:
+        return "soc"
+
+    # Positions are consecutive, so a row contains a tie exactly when it ranks more candidates
+    # than its lowest position.
+    ranked = rankMatrix > 0
+    tiesPresent = bool(np.any(ranked.sum(axis=1) > rankMatrix.max(axis=1)))
+    incompletePresent = not bool(ranked.all())
+
+    if tiesPresent == False and incompletePresent == False:
+        elecType = "soc"
+    elif tiesPresent == False and incompletePresent == True:
+        elecType = "soi"
+    elif tiesPresent == True and incompletePresent == False:
+        elecType = "toc"
+    else:
+        elecType = "toi"
+    return elecType
+
+
+def getPairwiseMatrix(rankMatrix, counts, unrankedLast = False, chunkSize = 1 << 22):
+    """
+    Returns an (m, m) int64 array whose entry [i, j] is the number of voters who rank candidate i
+    strictly above candidate j.
+
+    The matrix is built one candidate at a time over blocks of voters. Each block is transposed so
+    that the comparisons of candidate i against all other candidates run over contiguous memory,
+    and the comparisons are weighted by the counts with a single matrix-vector product. The
+    products are exact because the floating point type is chosen from the total number of voters.
+
+    :ivar ndarray rankMatrix: The (n, m) rank matrix.
+    :ivar ndarray counts: The number of voters of each row.
+    :ivar bool unrankedLast: If unrankedLast is True, unranked candidates are considered to be
+        ranked below all ranked candidates. Otherwise, votes that leave either candidate unranked
+        do not count towards that pair.
+    :ivar int chunkSize: The number of rank matrix entries compared at once.
+    """
+
+    numVotes, numCands = rankMatrix.shape
+    total = int(np.sum(np.abs(counts)))
+    if total < 2**24:
+        dtype = np.float32
+    elif total < 2**53:
+        dtype = np.float64
+    else:
+        dtype = np.int64
+
+    pairwise = np.zeros((numCands, numCands), dtype=np.float64 if dtype != np.int64 else np.int64)
+    blockSize = max(1, chunkSize // max(numCands, 1))
+    for start in range(0, numVotes, blockSize):
+        ranks = np.ascontiguousarray(rankMatrix[start:start + blockSize].T)
+        if unrankedLast == True:
+            ranks = np.where(ranks == 0, numCands + 1, ranks)
+        blockCounts = counts[start:start + blockSize]
+
+        # Candidate i is ranked above candidate j when 0 < rank(i) < rank(j). Unranked candidates
+        # have rank 0, so it is enough to drop the votes that leave i unranked.
+        for i in range(0, numCands):
+            weights = np.where(ranks[i] > 0, blockCounts, 0).astype(dtype)
+            pairwise[i] += np.dot((ranks > ranks[i]).astype(dtype), weights)
+
+    return pairwise.astype(np.int64)
+
+
+def getPositionMatrix(rankMatrix, counts):
+    """
+    Returns an (m, m) int64 array whose entry [i, p] is the number of voters who rank candidate i
+    at position p + 1. Tied candidates share their position, as in the rank matrix, and unranked
+    candidates are not counted.
+
+    :ivar ndarray rankMatrix: The (n, m) rank matrix.
+    :ivar ndarray counts: The number of voters of each row.
+    """
+
+    numVotes, numCands = rankMatrix.shape
+    positions = np.zeros((numCands, numCands), dtype=np.int64)
+    if numVotes == 0:
+        return positions
+
+    # Integer counts are exact as float64 weights up to 2**53 voters.
+    weights = np.asarray(counts, dtype=np.float64)
+    for i in range(0, numCands):
+        histogram = np.bincount(rankMatrix[:, i], weights=weights, minlength=numCands + 1)
+        positions[i] = histogram[1:numCands + 1]
+    return positions
+
+
+def stackRankMatrices(rankMatrices, countsList):
+    """
+    Packs K rank matrices over the same number of candidates into a (K, n_max, m) rank tensor,
+    where n_max is the largest number of rows, and a (K, n_max) count array. Shorter rank matrices
+    are padded with rows whose count is 0, so the padding does not count towards any statistic.
+
+    :ivar list<ndarray> rankMatrices: The (n_k, m) rank matrices.
+    :ivar list<ndarray> countsList: The number of voters of each row of each rank matrix.
+    """
+
+    numCands = rankMatrices[0].shape[1]
+    maxVotes = max([rankMatrix.shape[0] for rankMatrix in rankMatrices])
+    rankTensor = np.zeros((len(rankMatrices), maxVotes, numCands), dtype=RANK_DTYPE)
+    countMatrix = np.zeros((len(rankMatrices), maxVotes), dtype=COUNT_DTYPE)
+    for k in range(0, len(rankMatrices)):
+        if rankMatrices[k].shape[1] != numCands:
+            raise ValueError("all rank matrices must have the same number of candidates")
+        numVotes = rankMatrices[k].shape[0]
+        rankTensor[k, :numVotes] = rankMatrices[k]
+        countMatrix[k, :numVotes] = countsList[k]
+    return rankTensor, countMatrix
+
+
+def getStackedPositionMatrices(rankTensor, countMatrix):
+    """
+    Returns a (K, m, m) int64 array that holds the position matrix, as in getPositionMatrix(), of
+    each rank matrix of a rank tensor built by stackRankMatrices().
+
+    :ivar ndarray rankTensor: The (K, n_max, m) rank tensor.
+    :ivar ndarray countMatrix: The (K, n_max) count array.
+    """
+
+    numStacked, maxVotes, numCands = rankTensor.shape
+
+    # Every entry is given its own bin, made of its rank matrix, its candidate and its position.
+    bins = (np.arange(numStacked)[:, None, None] * numCands + np.arange(numCands)[None, None, :])
+    bins = bins * (numCands + 1) + rankTensor
+    weights = np.broadcast_to(np.asarray(countMatrix, dtype=np.float64)[:, :, None], bins.shape)
+    histogram = np.bincount(bins.ravel(), weights=weights.ravel(),
+        minlength=numStacked * numCands * (numCands + 1))
+    histogram = histogram.reshape(numStacked, numCands, numCands + 1)
+    return histogram[:, :, 1:].astype(np.int64)
+
+
+def getStackedWmgMatrices(rankTensor, countMatrix):
+    """
+    Returns a (K, m, m) int64 array that holds the weighted majority graph, as in getWmgMatrix(),
+    of each rank matrix of a rank tensor built by stackRankMatrices().
+
+    :ivar ndarray rankTensor: The (K, n_max, m) rank tensor.
+    :ivar ndarray countMatrix: The (K, n_max) count array.
+    """
+
+    numStacked, maxVotes, numCands = rankTensor.shape
+    weights = np.asarray(countMatrix, dtype=np.float64)
+    pairwise = np.zeros((numStacked, numCands, numCands), dtype=np.float64)
+    for i in range(0, numCands):
+        ranks = rankTensor[:, :, i:i + 1]
+        above = (rankTensor > ranks) & (ranks > 0)
+        pairwise[:, i, :] = np.einsum("kn,knj->kj", weights, above.astype(np.float64))
+    pairwise = pairwise.astype(np.int64)
+    return pairwise - pairwise.transpose(0, 2, 1)
+
+
+def getWmgMatrix(rankMatrix, counts):
+    """
+    Returns an (m, m) int64 array whose entry [i, j] is the number of voters who rank candidate i
+    above candidate j minus the number of voters who rank j above i. Votes that leave either
+    candidate unranked do not count towards that pair.
+
+    :ivar ndarray rankMatrix: The (n, m) rank matrix.
+    :ivar ndarray counts: The number of voters of each row.
+    """
+
+    pairwise = getPairwiseMatrix(rankMatrix, counts)
+    return pairwise - pairwise.T
+
+
+def wmgMatrixToMap(wmg, candList):
+    """
+    Converts an (m, m) weighted majority graph array into the two-dimensional dictionary returned
+    by Profile.getWmg().
+
+    :ivar ndarray wmg: The (m, m) weighted majority graph.
+    :ivar list<int> candList: The integer representations of the candidates in column order.
+    """
+
+    rows = wmg.tolist()
+    wmgMap = dict()
+    for i in range(0, len(candList)):
+        wmgMap[candList[i]] = dict()
+        for j in range(0, len(candList)):
+            if i != j:
+                wmgMap[candList[i]][candList[j]] = rows[i][j]
+    return wmgMap
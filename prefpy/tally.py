@@ -0,0 +1,115 @@
+"""
+Incremental tallies of positional scores and the weighted majority graph of a Profile.
+"""
+import numpy as np
+import pairwise
+
+
+class IncrementalTally():
+    """
+    Keeps the position count matrix and the weighted majority graph of a Profile up to date as
+    preferences are added, removed or reweighted, so that the Borda, plurality and Copeland scores
+    can be read at any time without going over the votes again. Each change to the Profile costs
+    O(m^2). The tally assumes complete orderings over the candidates, as the corresponding
+    mechanisms do.
+
+    :ivar Profile profile: The Profile being tallied. The tally subscribes to its changes.
+    :ivar list<int> candList: The integer representations of the candidates, in the order of the
+        rows and columns of the arrays below.
+    :ivar ndarray positionMatrix: An (m, m) int64 array whose entry [i, p] is the number of voters
+        who rank the i-th candidate at position p + 1, as in Profile.getPositionMatrix().
+    :ivar ndarray wmg: An (m, m) int64 array holding the weighted majority graph, as in
+        Profile.getWmgMatrix().
+    :ivar float alpha: The score given to each candidate of a tied pair under Copeland.
+    """
+
+    def __init__(self, profile, alpha = 0.5):
+        self.profile = profile
+        self.candList = profile.getCandList()
+        self.alpha = alpha
+
+        # The profile's cached views must not be modified, so we tally copies.
+        self.positionMatrix = profile.getPositionMatrix().copy()
+        self.wmg = profile.getWmgMatrix().copy()
+        profile.subscribe(self.update)
+
+    def close(self):
+        """
+        Stops following the changes of the profile.
+        """
+
+        self.profile.unsubscribe(self.update)
+
+    def update(self, rankRow, countDelta):
+        """
+        Applies a change in the count of one preference to the tally. This is called by the
+        profile.
+
+        :ivar ndarray rankRow: The rank matrix row of the preference that changed.
+        :ivar int countDelta: The signed change in the count of the preference.
+        """
+
+        ranks = np.asarray(rankRow, dtype=np.int64)
+        ranked = np.flatnonzero(ranks > 0)
+        self.positionMatrix[ranked, ranks[ranked] - 1] += countDelta
+
+        # Candidate i is above candidate j when 0 < rank(i) < rank(j), as in
+        # rankmatrix.getPairwiseMatrix().
+        above = (ranks[:, None] > 0) & (ranks[None, :] > ranks[:, None])
+        self.wmg += countDelta * (above.astype(np.int64) - above.T.astype(np.int64))
+
+    def getCandScores(self, rule):
+        """
+        Returns an array with the score of each candidate of candList under the given rule.
+
+        :ivar str rule: One of "borda", "plurality" or "copeland".
+        """
+
+        numCands = len(self.candList)
+        if rule == "borda":
+            scoringVector = np.arange(numCands - 1, -1, -1, dtype=float)
+            return np.dot(self.positionMatrix.astype(float), scoringVector)
+        elif rule == "plurality":
+            return self.positionMatrix[:, 0].astype(float)
+        elif rule == "copeland":
+            return pairwise.getCopelandScores(self.wmg, self.alpha)
+        else:
+            raise ValueError("unsupported rule %s" % rule)
+
+    def getCandScoresMap(self, rule):
+        """
+        Returns a dictionary that associates the integer representation of each candidate with its
+        score under the given rule, as the getCandScoresMap() method of the mechanism does.
+
+        :ivar str rule: One of "borda", "plurality" or "copeland".
+        """
+
+        scores = self.getCandScores(rule).tolist()
+        candScoresMap = dict()
+        for j in range(0, len(self.candList)):
+            candScoresMap[self.candList[j]] = float(scores[j])
+        return candScoresMap
+
+    def getWinners(self, rule):
+        """
+        Returns a list of all the candidates with the highest score under the given rule.
+
+        :ivar str rule: One of "borda", "plurality" or "copeland".
+        """
+
+        scores = self.getCandScores(rule)
+        return [self.candList[j] for j in np.flatnonzero(scores == scores.max())]
+
+    def getRanking(self, rule):
+        """
+        Returns a list that contains a list of tiers of candidates, ordered from the highest score
+        to the lowest under the given rule, in the format of Mechanism.getRanking().
+
+        :ivar str rule: One of "borda", "plurality" or "copeland".
+        """
+
+        scores = self.getCandScores(rule)
+        ranking = []
+        for score in sorted(set(scores.tolist()), reverse=True):
+            ranking.append([self.candList[j] for j in np.flatnonzero(scores == score)])
+        return [ranking]
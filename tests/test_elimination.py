@@ -0,0 +1,184 @@
+import os
+import sys
+import unittest
+import numpy as np
+from prefpy.profile import Profile
+
+# The elimination module imports its sibling modules by their top-level names.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "prefpy"))
+import elimination
+
+
+class PluralityScorer(elimination.TierScorer):
+    """
+    Scores each remaining candidate from scratch by the number of voters who rank it in their top
+    tier of remaining candidates. The reference for IncrementalPluralityScorer.
+    """
+
+    def __init__(self, rankMatrix, counts):
+        elimination.TierScorer.__init__(self, rankMatrix.shape[1],
+            elimination.getTierStates(rankMatrix), counts)
+
+
+class BordaScorer(elimination.EliminationScorer):
+    """
+    Scores each remaining candidate from scratch by the row sum of the pairwise matrix over the
+    remaining candidates. The reference for IncrementalBordaScorer.
+    """
+
+    def __init__(self, pairwiseMatrix):
+        elimination.EliminationScorer.__init__(self, pairwiseMatrix.shape[0])
+        self.pairwiseMatrix = np.asarray(pairwiseMatrix, dtype=np.int64)
+
+    def getScores(self, state):
+        return self.pairwiseMatrix[:, elimination.stateToIndices(state)].sum(axis=1).tolist()
+
+
+def randomProfile(rng, numCands, numVotes, elecType):
+    """
+    Returns a dense Profile of random votes, with ties when elecType is "toc".
+    """
+
+    rankMatrix = np.zeros((numVotes, numCands), dtype=np.int64)
+    for vote in range(0, numVotes):
+        order = rng.permutation(numCands)
+        if elecType == "soc":
+            rankMatrix[vote, order] = np.arange(1, numCands + 1)
+        else:
+            # Each candidate after the first starts a new tier with probability one half.
+            positions = np.cumsum(np.concatenate(([1], rng.randint(0, 2, numCands - 1))))
+            rankMatrix[vote, order] = positions
+    profile = Profile(dict((i, str(i)) for i in range(1, numCands + 1)), [])
+    profile.importRankMatrix(rankMatrix, rng.randint(1, 4, numVotes).tolist())
+    return profile
+
+
+def referenceWinners(profile, rule):
+    """
+    Returns the bitmask of the winners of the elimination rule over every elimination order,
+    computed from the definition of the rule on the rank matrix of a profile that ranks every
+    candidate.
+    """
+
+    rankMatrix = profile.getRankMatrix()
+    counts = profile.getCountVector()
+    numCands = rankMatrix.shape[1]
+
+    def getLosers(remaining):
+        ranks = rankMatrix[:, remaining]
+        if rule == "borda":
+            above = (ranks[:, :, None] < ranks[:, None, :]).astype(np.int64)
+            scores = np.tensordot(counts, above, axes=1).sum(axis=1)
+            return [remaining[i] for i in np.flatnonzero(scores == scores.min())]
+        if rule == "plurality":
+            tier = ranks == ranks.min(axis=1)[:, None]
+        else:
+            tier = ranks == ranks.max(axis=1)[:, None]
+        scores = counts.dot(tier)
+        worst = scores.min() if rule == "plurality" else scores.max()
+        return [remaining[i] for i in np.flatnonzero(scores == worst)]
+
+    seen = dict()
+
+    def search(state):
+        if state not in seen:
+            remaining = elimination.stateToIndices(state)
+            if len(remaining) == 1:
+                seen[state] = state
+            else:
+                winners = 0
+                for cand in getLosers(remaining):
+                    winners |= search(state & ~(1 << cand))
+                seen[state] = winners
+        return seen[state]
+
+    return search((1 << numCands) - 1)
+
+
+class TestIncrementalScorers(unittest.TestCase):
+
+    def walk(self, rng, scorer, reference, numCands, numSteps=300):
+        """
+        Moves the scorer along a random walk of advance() and retreat() calls, as the search does,
+        and checks it against the reference in each state.
+        """
+
+        path = [(1 << numCands) - 1]
+        removed = []
+        for step in range(0, numSteps):
+            state = path[-1]
+            self.assertEqual(scorer.getLosers(state), reference.getLosers(state))
+            remaining = elimination.stateToIndices(state)
+            scores = scorer.getScores(state)
+            self.assertEqual([scores[i] for i in remaining],
+                             [reference.getScores(state)[i] for i in remaining])
+            if len(remaining) > 1 and (not removed or rng.rand() < 0.6):
+                cand = remaining[rng.randint(len(remaining))]
+                scorer.advance(state, cand)
+                path.append(state & ~(1 << cand))
+                removed.append(cand)
+            elif removed:
+                path.pop()
+                scorer.retreat(path[-1], removed.pop())
+
+    def test_plurality(self):
+        rng = np.random.RandomState(0)
+        for elecType in ("soc", "toc"):
+            for trial in range(0, 10):
+                profile = randomProfile(rng, rng.randint(2, 10), rng.randint(1, 30), elecType)
+                rankMatrix = profile.getRankMatrix()
+                counts = profile.getCountVector()
+                self.walk(rng, elimination.IncrementalPluralityScorer(rankMatrix, counts),
+                          PluralityScorer(rankMatrix, counts), rankMatrix.shape[1])
+
+    def test_borda(self):
+        rng = np.random.RandomState(1)
+        for elecType in ("soc", "toc"):
+            for trial in range(0, 10):
+                profile = randomProfile(rng, rng.randint(2, 10), rng.randint(1, 30), elecType)
+                pairwiseMatrix = profile.getPairwiseMatrix()
+                self.walk(rng, elimination.IncrementalBordaScorer(pairwiseMatrix),
+                          BordaScorer(pairwiseMatrix), pairwiseMatrix.shape[0])
+
+
+class TestEliminationSearch(unittest.TestCase):
+
+    def getScorers(self, profile):
+        rankMatrix = profile.getRankMatrix()
+        counts = profile.getCountVector()
+        return [("plurality", elimination.IncrementalPluralityScorer(rankMatrix, counts)),
+                ("veto", elimination.VetoScorer(rankMatrix, counts)),
+                ("borda", elimination.IncrementalBordaScorer(profile.getPairwiseMatrix()))]
+
+    def test_matches_definition(self):
+        rng = np.random.RandomState(2)
+        for elecType in ("soc", "toc"):
+            for trial in range(0, 10):
+                profile = randomProfile(rng, rng.randint(2, 8), rng.randint(1, 12), elecType)
+                startState = (1 << profile.numCands) - 1
+                for rule, scorer in self.getScorers(profile):
+                    winners, stats = elimination.eliminationSearch(scorer, startState)
+                    self.assertTrue(stats.complete)
+                    self.assertEqual(winners, referenceWinners(profile, rule))
+
+    def test_parallel_expands_about_as_many_states(self):
+        # A few votes with ties over many candidates reach most states by several elimination
+        # orders, so workers that do not share their visited states expand many of them twice.
+        rng = np.random.RandomState(7)
+        profile = randomProfile(rng, 16, 6, "toc")
+        startState = (1 << profile.numCands) - 1
+        for rule, scorer in self.getScorers(profile):
+            winners, stats = elimination.eliminationSearch(scorer, startState)
+            for processes in (2, 4):
+                rootsPerProcess = 4
+                parallelWinners, parallelStats = elimination.parallelEliminationSearch(scorer,
+                    startState, processes, rootsPerProcess)
+                self.assertEqual(parallelWinners, winners)
+                self.assertTrue(parallelStats.complete)
+                self.assertLessEqual(parallelStats.numNodes,
+                    1.25 * stats.numNodes + rootsPerProcess * processes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from prefpy import prefpy_io
+from prefpy import rankmatrix
+
+ELECTION = """3
+1,a
+2,b
+3,c
+9,9,4
+3,1,2,3
+2,{2,3},1
+1,3,{1,2}
+3,2
+"""
+
+
+class TestReadElectionFileParallel(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def writeElection(self, text):
+        fileName = os.path.join(self.directory, "election.toi")
+        with open(fileName, "w") as outputFile:
+            outputFile.write(text)
+        return fileName
+
+    def assertReadersAgree(self, fileName):
+        with open(fileName, "r") as inputFile:
+            candMap, rankMaps, counts, numVoters = prefpy_io.read_election_file(inputFile)
+        for numRanges in [1, 2, 3, 50]:
+            result = prefpy_io.read_election_file_parallel(fileName, processes=2,
+                                                           numranges=numRanges)
+            self.assertEqual(result[0], candMap)
+            rankMatrix = rankmatrix.rankMapsToMatrix(rankMaps, sorted(candMap.keys()))
+            np.testing.assert_array_equal(result[1], rankMatrix)
+            self.assertEqual(result[2].tolist(), counts)
+            self.assertEqual(result[3], numVoters)
+
+    def test_orders_only(self):
+        self.assertReadersAgree(self.writeElection(ELECTION))
+
+    def test_no_final_newline(self):
+        self.assertReadersAgree(self.writeElection(ELECTION.rstrip("\n")))
+
+    def test_trailing_content(self):
+        text = ELECTION + "\n\n2,1,3,2\nnot an order\n"
+        self.assertReadersAgree(self.writeElection(text))
+
+    def test_blank_order_line(self):
+        lines = ELECTION.split("\n")
+        fileName = self.writeElection("\n".join(lines[:6] + [""] + lines[6:]))
+        with open(fileName, "r") as inputFile:
+            self.assertRaises(ValueError, prefpy_io.read_election_file, inputFile)
+        self.assertRaises(ValueError, prefpy_io.read_election_file_parallel, fileName,
+                          processes=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+from prefpy.preference import Preference
+from prefpy.profile import Profile
+
+
+class TestDenseProfileMutation(unittest.TestCase):
+
+    def setUp(self):
+        self.profile = Profile({1: "a", 2: "b", 3: "c"}, [])
+        self.profile.importRankMatrix(np.array([[1, 2, 3], [3, 1, 2]]), [2, 1])
+        # Reading the preferences builds and stores the list of the dense Profile.
+        self.assertEqual(len(self.profile.preferences), 2)
+
+    def assertPreferencesMatch(self):
+        preferences = self.profile.preferences
+        self.assertEqual(len(preferences), self.profile.getRankMatrix().shape[0])
+        self.assertEqual([preference.count for preference in preferences],
+                         self.profile.getCountVector().tolist())
+        rankMaps = [preference.getRankMap() for preference in preferences]
+        self.assertEqual(rankMaps, self.profile.getRankMaps())
+
+    def test_addPreference(self):
+        wmgMap = {1: {2: -1, 3: -1}, 2: {1: 1, 3: 1}, 3: {1: 1, 2: -1}}
+        self.profile.addPreference(Preference(wmgMap, 4))
+        self.assertPreferencesMatch()
+        self.assertEqual(self.profile.preferences[2].count, 4)
+
+    def test_removePreference(self):
+        self.profile.removePreference(0)
+        self.assertPreferencesMatch()
+        self.assertEqual(self.profile.preferences[0].getRankMap(), {2: 1, 3: 2, 1: 3})
+
+    def test_reweightPreference(self):
+        self.profile.reweightPreference(0, 10)
+        self.assertPreferencesMatch()
+        self.assertEqual(self.profile.preferences[0].count, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class TestDenseProfileStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.rankMatrix = np.array([[1, 2, 3], [3, 1, 2]])
+        self.counts = np.array([2, 1])
+        self.profile = Profile({1: "a", 2: "b", 3: "c"}, [])
+        self.profile.importRankMatrix(self.rankMatrix, self.counts)
+        self.sparse = Profile({1: "a", 2: "b", 3: "c"}, [])
+        self.sparse.preferences = list(self.profile.preferences)
+        self.sparse.numVoters = self.profile.numVoters
+
+    def test_matches_sparse_profile(self):
+        rankings = [{1: 1, 2: 2, 3: 3}, {2: 1, 1: 2, 3: 2}, {3: 1, 2: 2, 1: 3}]
+        for i in range(0, 200):
+            for profile in [self.profile, self.sparse]:
+                if i % 5 == 4:
+                    profile.removePreference(i % 3)
+                elif i % 5 == 3:
+                    profile.reweightPreference(-1, i)
+                else:
+                    rankMap = rankings[i % 3]
+                    wmgMap = profile.genWmgMapFromRankMap(rankMap)
+                    profile.addPreference(Preference(wmgMap, i % 4 + 1))
+            np.testing.assert_array_equal(self.profile.getRankMatrix(), self.sparse.getRankMatrix())
+            np.testing.assert_array_equal(self.profile.getCountVector(),
+                                          self.sparse.getCountVector())
+            self.assertEqual(self.profile.numVoters, self.sparse.numVoters)
+
+    def test_imported_arrays_are_not_modified(self):
+        self.profile.reweightPreference(0, 7)
+        self.profile.removePreference(1)
+        self.assertEqual(self.counts.tolist(), [2, 1])
+        self.assertEqual(self.rankMatrix.tolist(), [[1, 2, 3], [3, 1, 2]])
+        self.assertEqual(self.profile.getCountVector().tolist(), [7])
+
+    def test_rows_are_copied_amortized(self):
+        wmgMap = self.profile.genWmgMapFromRankMap({1: 1, 2: 2, 3: 3})
+        buffer = None
+        numBuffers = 0
+        for i in range(0, 1000):
+            self.profile.addPreference(Preference(wmgMap, 1))
+            if self.profile._rankBuffer is not buffer:
+                buffer = self.profile._rankBuffer
+                numBuffers += 1
+        self.assertEqual(self.profile.getRankMatrix().shape, (1002, 3))
+        self.assertLessEqual(numBuffers, 8)